@@ -0,0 +1,141 @@
+import os
+import secrets
+import time
+from datetime import date, timedelta
+
+import streamlit as st
+
+import db
+# CSV exports are written here chunk by chunk, so building one never holds
+# the table in memory. The directory is not web-served: the file only
+# leaves through st.download_button, inside the signed-in admin session.
+# Names are random; files go when replaced or after EXPORT_MAX_AGE.
+EXPORT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".exports")
+EXPORT_MAX_AGE = 3600
+
+# =====================================================
+# PAGER (keyset cursors kept in session state)
+# =====================================================
+def _pager(key, filters, fetch):
+    """Fetch the current page via fetch(cursor) -> (rows, next_cursor); filter changes restart at page 1."""
+    state = st.session_state.setdefault(key, {"filters": None, "stack": [None]})
+    if state["filters"] != filters:
+        state["filters"] = filters
+        state["stack"] = [None]
+    stack = state["stack"]
+
+    rows, next_cursor = fetch(stack[-1])
+    return rows, next_cursor, stack
+
+
+def _pager_buttons(key, next_cursor, stack):
+    c1, c2, c3 = st.columns([1, 2, 1])
+    if c1.button("Previous", disabled=len(stack) == 1, key=f"{key}_prev"):
+        stack.pop()
+        st.rerun()
+    c2.caption(f"Page {len(stack)}")
+    if c3.button("Next", disabled=next_cursor is None, key=f"{key}_next"):
+        stack.append(next_cursor)
+        st.rerun()
+
+
+def _prune_exports():
+    now = time.time()
+    for entry in os.scandir(EXPORT_DIR):
+        try:
+            if now - entry.stat().st_mtime > EXPORT_MAX_AGE:
+                os.remove(entry.path)
+        except FileNotFoundError:
+            # pruned by another session at the same time
+            pass
+
+
+def _export_csv(key, prefix, chunks):
+    """Write `chunks` to a fresh export file, replacing (and deleting) this session's previous one."""
+    os.makedirs(EXPORT_DIR, exist_ok=True)
+    _prune_exports()
+    path = os.path.join(EXPORT_DIR, f"{prefix}-{secrets.token_urlsafe(16)}.csv")
+    with open(path + ".tmp", "w", newline="") as f:
+        for chunk in chunks:
+            f.write(chunk)
+    os.replace(path + ".tmp", path)
+    old = st.session_state.get(key)
+    if old and os.path.exists(old):
+        os.remove(old)
+    st.session_state[key] = path
+
+
+def _export_button(key, file_name):
+    path = st.session_state.get(key)
+    if not path or not os.path.exists(path):
+        return
+    with open(path, "rb") as f:
+        st.download_button("Download CSV", f, file_name=file_name, mime="text/csv")
+
+
+# =====================================================
+# USERS
+# =====================================================
+def users_view(table=st.dataframe):
+    c1, c2, c3 = st.columns([3, 1, 1])
+    prefix = c1.text_input("Email starts with", key="users_prefix").strip()
+    size = c2.selectbox("Rows", [25, 50, 100, 250], index=1, key="users_size")
+    descending = c3.selectbox("Order", ["A-Z", "Z-A"], key="users_order") == "Z-A"
+
+    def fetch(after):
+        rows = db.users_page(after, size, prefix or None, descending)
+        return rows, rows[-1][1] if len(rows) == size else None
+
+    rows, next_cursor, stack = _pager("users_pager", (prefix, size, descending), fetch)
+    table([{"name": n, "email": e, "role": r} for n, e, r in rows])
+    _pager_buttons("users_pager", next_cursor, stack)
+
+
+# =====================================================
+# LOGIN HISTORY
+# =====================================================
+def logins_view(table=st.dataframe):
+    c1, c2 = st.columns([3, 2])
+    email = c1.text_input("Email", key="logins_email").strip() or None
+    dates = c2.date_input("Date range", value=(), key="logins_dates")
+    c3, c4 = st.columns(2)
+    size = c3.selectbox("Rows", [25, 50, 100, 250], index=1, key="logins_size")
+    newest_first = c4.selectbox("Order", ["Newest first", "Oldest first"], key="logins_order") == "Newest first"
+
+    start = dates[0] if len(dates) > 0 else None
+    end = dates[1] + timedelta(days=1) if len(dates) > 1 else None
+
+    def fetch(after):
+        return db.logins_page(after, size, email, start, end, newest_first)
+
+    filters = (email, start, end, size, newest_first)
+    rows, next_cursor, stack = _pager("logins_pager", filters, fetch)
+    table([{"email": e, "login_time": t} for e, t in rows])
+    _pager_buttons("logins_pager", next_cursor, stack)
+
+    # written chunk by chunk so the query side never holds the whole table
+    if st.button("Prepare CSV export"):
+        _export_csv("logins_export", "logins", db.iter_logins_csv(email, start, end))
+    _export_button("logins_export", "logins.csv")
+
+
+# =====================================================
+# RECOGNITION ACTIVITY
+# =====================================================
+def recognition_view(table=st.dataframe):
+    # served from the recognition_daily rollup; raw events are never scanned
+    days = st.selectbox("Period", [7, 30, 90, 0], key="recognition_days",
+                        format_func=lambda d: f"Last {d} days" if d else "All time")
+    since = str(date.today() - timedelta(days=days - 1)) if days else ""
+
+    def rounded(value, digits):
+        return round(value, digits) if value is not None else None
+
+    table([
+        {"email": email, "letters": letters, "mean conf": rounded(conf, 3),
+         "frames per letter": rounded(frames, 1), "words": words, "sentences": sentences}
+        for email, letters, conf, frames, words, sentences in db.recognition_by_user(since)
+    ])
+    st.subheader("Per day")
+    table([{"day": day, "letters": letters, "words": words, "sentences": sentences}
+           for day, letters, words, sentences in db.recognition_daily(since)])
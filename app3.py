@@ -1,29 +1,32 @@
+import functools
 import os
 os.environ["OPENCV_VIDEOIO_PRIORITY_MSMF"] = "0"
 
-import base64
 import streamlit as st
 import sqlite3
-import cv2
 import time
-import mediapipe as mp
-from ultralytics import YOLO
-from datetime import datetime
-from tts_edge import speak_sentence
-import pandas as pd
+import uuid
+from datetime import datetime, timedelta
+import auth
+import db
+import registry
+import metrics
+from config import RECOGNIZERS, RECOGNIZER, PREWARM, SUGGESTIONS, EVENT_LOG, LANDMARK_MODEL_PATH
+from page_assets import background_url
+from admin_views import users_view, logins_view, recognition_view
 
 # =====================================================
 # UI / UX – PROFESSIONAL CSS
 # =====================================================
 def set_bg(image_path):
-    with open(image_path, "rb") as img:
-        encoded = base64.b64encode(img.read()).decode()
+    # converted and cached once per process; see page_assets.py
+    bg = background_url(image_path)
 
     st.markdown(
         f"""
         <style>
         .stApp {{
-            background-image: url("data:image/png;base64,{encoded}");
+            background-image: {bg};
             background-size: cover;
             background-position: center;
             background-repeat: no-repeat;
@@ -67,27 +70,8 @@ def set_bg(image_path):
 # =====================================================
 # DATABASE
 # =====================================================
-db = sqlite3.connect("database.db", check_same_thread=False)
-cur = db.cursor()
-
-cur.execute("""
-CREATE TABLE IF NOT EXISTS users(
-    id INTEGER PRIMARY KEY AUTOINCREMENT,
-    name TEXT,
-    email TEXT UNIQUE,
-    password TEXT,
-    role TEXT
-)
-""")
-
-cur.execute("""
-CREATE TABLE IF NOT EXISTS logins(
-    id INTEGER PRIMARY KEY AUTOINCREMENT,
-    email TEXT,
-    login_time TEXT
-)
-""")
-db.commit()
+# WAL, pooled per-thread connections and batched login inserts; see db.py
+db.pool()
 
 # =====================================================
 # SESSION STATE
@@ -108,14 +92,19 @@ def login_page():
     password = st.text_input("Password", type="password")
 
     if st.button("Login"):
-        cur.execute("SELECT * FROM users WHERE email=? AND password=?", (email, password))
-        user = cur.fetchone()
-        if user:
-            st.session_state.page = "app"
-            cur.execute("INSERT INTO logins VALUES(NULL,?,?)", (email, datetime.now()))
-            db.commit()
+        try:
+            # hashing runs on auth's worker pool; the spinner covers the wait
+            with st.spinner("Signing in..."):
+                token, user = auth.login(email, password)
+        except auth.LoginError as e:
+            st.error(str(e))
         else:
-            st.error("Invalid credentials")
+            st.session_state.page = "app"
+            st.session_state.token = token
+            st.session_state.email = user["email"]
+            db.record_login(user["email"])
+            if PREWARM:
+                registry.preload()
 
     st.caption("New user?")
     if st.button("Create Account"):
@@ -142,12 +131,10 @@ def signup_page():
 
     if st.button("Register"):
         try:
-            cur.execute("INSERT INTO users VALUES(NULL,?,?,?,?)",
-                        (name, email, password, "user"))
-            db.commit()
+            auth.register(name, email, password, "user")
             st.success("Account created successfully")
             st.session_state.page = "login"
-        except:
+        except sqlite3.IntegrityError:
             st.error("Email already exists")
 
     if st.button("Back to Login"):
@@ -164,37 +151,46 @@ def admin_login():
     st.markdown("<div class='glass'>", unsafe_allow_html=True)
     st.title("Admin Authentication")
 
-    user = st.text_input("Admin Username")
+    email = st.text_input("Admin Email")
     pwd = st.text_input("Password", type="password")
 
     if st.button("Login"):
-        if user == "admin" and pwd == "admin123":
-            st.session_state.page = "admin_dashboard"
-        else:
+        # any account with role "admin"; grant it with `python auth.py set-role EMAIL admin`
+        try:
+            with st.spinner("Signing in..."):
+                token, _ = auth.login(email, pwd, role="admin")
+        except auth.LoginError:
             st.error("Invalid admin credentials")
+        else:
+            st.session_state.token = token
+            st.session_state.page = "admin_dashboard"
 
     st.markdown("</div>", unsafe_allow_html=True)
 
 # =====================================================
 # ADMIN DASHBOARD (WITH GRAPH)
 # =====================================================
+@st.cache_data(ttl=60)
+def login_activity():
+    import pandas as pd
+
+    # reads the incrementally maintained rollups, never the raw logins table
+    daily = pd.DataFrame(db.daily_logins(), columns=["day", "Logins", "Distinct users"])
+    since = (datetime.now() - timedelta(hours=48)).strftime("%Y-%m-%d %H")
+    hourly = pd.DataFrame(db.hourly_logins(since), columns=["hour", "Logins"])
+    return db.count_users(), db.total_logins(), daily.set_index("day"), hourly.set_index("hour")
+
+
 def admin_dashboard():
     set_bg("assets/addashboard.png")
     st.sidebar.title("Admin Panel")
 
-    nav = st.sidebar.radio("Navigation", ["Dashboard", "Users", "Logout"])
+    nav = st.sidebar.radio("Navigation", ["Dashboard", "Users", "Logs", "Recognition", "Logout"])
 
     if nav == "Dashboard":
         st.header("System Activity Overview")
 
-        cur.execute("SELECT COUNT(*) FROM users")
-        total_users = cur.fetchone()[0]
-
-        cur.execute("SELECT login_time FROM logins")
-        logs = cur.fetchall()
-        df = pd.DataFrame(logs, columns=["time"])
-        df["time"] = pd.to_datetime(df["time"])
-        daily = df.groupby(df["time"].dt.date).size()
+        total_users, total_logins, daily, hourly = login_activity()
 
         c1, c2 = st.columns(2)
         with c1:
@@ -204,46 +200,88 @@ def admin_dashboard():
 
         with c2:
             st.markdown("<div class='metric-box'>", unsafe_allow_html=True)
-            st.metric("Total Logins", len(logs))
+            st.metric("Total Logins", total_logins)
             st.markdown("</div>", unsafe_allow_html=True)
 
         if not daily.empty:
             st.subheader("User Login Activity")
             st.line_chart(daily)
 
+        if not hourly.empty:
+            st.subheader("Logins per Hour (last 48h)")
+            st.bar_chart(hourly)
+
+        import pandas as pd
+
+        perf = pd.DataFrame(metrics.recent_p50(hours=24), columns=["time", "stage", "p50_ms"])
+        if not perf.empty:
+            st.subheader("Recognition Performance (p50 ms per stage, last 24h)")
+            st.line_chart(perf.pivot_table(index="time", columns="stage", values="p50_ms"))
+
     elif nav == "Users":
         st.header("Registered Users")
-        cur.execute("SELECT name,email,role FROM users")
-        st.dataframe(cur.fetchall(), use_container_width=True)
+        users_view()
+
+    elif nav == "Logs":
+        st.header("Login History")
+        logins_view()
+
+    elif nav == "Recognition":
+        st.header("Recognition Activity")
+        recognition_view()
 
     else:
+        auth.logout(st.session_state.pop("token", None))
         st.session_state.page = "login"
 
 # =====================================================
 # SIGN-TO-SPEECH (UNCHANGED CORE LOGIC)
 # =====================================================
 def sign_to_speech():
+    # vision and TTS modules are imported here, not at the top of the app, so
+    # the login and admin pages render without them (see registry.preload)
+    from tts_edge import speak_sentence, speak_word, stop_speaking, speech_stats
+    from recognition import make_assembler
+    from event_log import EventRecorder
+    from pipeline import RecognitionPipeline
+    from preview import Previewer
+
     set_bg("assets/addashboard.png")
     st.sidebar.title("Sign-to-Speech")
 
     section = st.sidebar.radio("Menu", ["Live Translation", "Logout"])
 
     if section == "Logout":
+        if st.session_state.get("pipeline") is not None:
+            st.session_state.pipeline.stop()
+            st.session_state.pipeline = None
+        auth.logout(st.session_state.pop("token", None))
         st.session_state.page = "login"
         st.stop()
 
     st.header("Live Sign-to-Speech Translation")
 
-    MODEL_PATH = "runs/classify/train/weights/best.pt"
-    CONF_THRESHOLD = 0.85
-    STABLE_FRAMES = 10
-    SPACE_TIME = 2.0
+    mode = st.sidebar.radio(
+        "Recognizer", RECOGNIZERS, index=RECOGNIZERS.index(RECOGNIZER),
+        format_func={"yolo": "Image classifier", "landmarks": "Landmarks (fast)"}.get,
+    )
 
-    model = YOLO(MODEL_PATH)
-    mp_hands = mp.solutions.hands
-    hands = mp_hands.Hands(max_num_hands=1)
+    # loaded once per process and shared by all sessions; each pipeline
+    # gets its own MediaPipe tracking graph
+    try:
+        recognizer = registry.get_recognizer(mode)
+    except FileNotFoundError:
+        if mode != "landmarks":
+            raise
+        st.error(f"No landmark model at {LANDMARK_MODEL_PATH}. Train one with `python train_landmarks.py`, "
+                 "or pick the image classifier.")
+        st.stop()
+    cap = registry.get_camera()
 
-    cap = cv2.VideoCapture(0, cv2.CAP_DSHOW)
+    stats = registry.load_stats()
+    st.sidebar.caption(
+        f"Model load {stats.get('model_load_s', 0):.2f}s, warmup {stats.get('model_warmup_s', 0):.2f}s"
+    )
 
     frame_box = st.image([])
     info_box = st.empty()
@@ -253,75 +291,115 @@ def sign_to_speech():
     speak_btn = col1.button("Speak Sentence")
     restart_btn = col2.button("Restart")
 
-    if "letters" not in st.session_state:
-        st.session_state.letters = []
-    if "words" not in st.session_state:
-        st.session_state.words = []
-    if "last_letter" not in st.session_state:
-        st.session_state.last_letter = None
-    if "stable_count" not in st.session_state:
-        st.session_state.stable_count = 0
-    if "last_hand_time" not in st.session_state:
-        st.session_state.last_hand_time = time.time()
+    if "assembler" not in st.session_state:
+        st.session_state.assembler = make_assembler(recognizer.names)
+    assembler = st.session_state.assembler
+    assembler.lexicon = registry.get_lexicon()
+    assembler.recorder = EventRecorder(st.session_state.get("email")) if EVENT_LOG else None
+
+    # accepts whichever suggestion is on screen when clicked
+    suggestion_cols = st.columns(SUGGESTIONS)
+    accepted = [col.button(f"Use suggestion {i + 1}", key=f"suggestion_{i}")
+                for i, col in enumerate(suggestion_cols)]
+
+    speak_words = st.sidebar.checkbox("Speak each word as it is recognized")
+    # speech is tagged per session so Restart only silences this user
+    speech = st.session_state.setdefault("speech_session", uuid.uuid4().hex)
+    assembler.on_word = functools.partial(speak_word, session=speech) if speak_words else None
+
+    for i, clicked in enumerate(accepted):
+        if clicked:
+            assembler.accept(i)
 
     if restart_btn:
-        st.session_state.letters.clear()
-        st.session_state.words.clear()
+        stop_speaking(speech)
+        assembler.reset()
         st.stop()
 
-    if speak_btn and st.session_state.words:
-        sentence = " ".join(st.session_state.words).capitalize()
+    if speak_btn and assembler.words:
+        sentence = assembler.sentence.capitalize()
         sentence_box.success(sentence)
-        speak_sentence(sentence)
+        if assembler.recorder is not None:
+            assembler.recorder.sentence(sentence)
+        speak_sentence(sentence, speech)
         st.stop()
 
     run = st.checkbox("Start Camera")
 
+    # the pipeline keeps running across reruns; only the UI loop restarts
+    pipeline = st.session_state.get("pipeline")
+    if not run:
+        if pipeline is not None:
+            pipeline.stop()
+            st.session_state.pipeline = None
+        return
+
+    if pipeline is not None and pipeline.recognizer is not recognizer:
+        pipeline.stop()
+        pipeline = None
+    if pipeline is None or not pipeline.alive:
+        if pipeline is not None:
+            # stopped itself (idle or error); close its graph before replacing it
+            pipeline.stop()
+        pipeline = RecognitionPipeline(cap, None, recognizer, assembler)
+        pipeline.start()
+        st.session_state.pipeline = pipeline
+
+    with st.expander("Performance"):
+        fps_box = st.empty()
+        stats_box = st.empty()
+        speech_box = st.empty()
+    last_stats = 0.0
+    last_text = None
+    previewer = Previewer()
+
     while run:
-        ret, frame = cap.read()
-        frame = cv2.flip(frame, 1)
-        rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        result = hands.process(rgb)
-
-        if not result.multi_hand_landmarks:
-            if st.session_state.letters and time.time() - st.session_state.last_hand_time > SPACE_TIME:
-                st.session_state.words.append("".join(st.session_state.letters))
-                st.session_state.letters.clear()
-            frame_box.image(frame, channels="BGR")
+        item = pipeline.latest()
+        if item is None:
             continue
 
-        st.session_state.last_hand_time = time.time()
-
-        h, w, _ = frame.shape
-        lm = result.multi_hand_landmarks[0].landmark
-        xs = [int(p.x * w) for p in lm]
-        ys = [int(p.y * h) for p in lm]
-
-        roi = frame[min(ys):max(ys), min(xs):max(xs)]
-        results = model(roi, verbose=False)
-        probs = results[0].probs
-
-        if probs and probs.top1conf > CONF_THRESHOLD:
-            letter = model.names[probs.top1]
-            if letter == st.session_state.last_letter:
-                st.session_state.stable_count += 1
-            else:
-                st.session_state.last_letter = letter
-                st.session_state.stable_count = 1
-
-            if st.session_state.stable_count >= STABLE_FRAMES:
-                st.session_state.letters.append(letter)
-                st.session_state.stable_count = 0
-
-        info_box.markdown(
-            f"**Current Word:** {''.join(st.session_state.letters)}  \n"
-            f"**Sentence:** {' '.join(st.session_state.words)}"
-        )
-        frame_box.image(frame, channels="BGR")
+        t0 = time.perf_counter()
+        frame, box, word, sentence = item
+        suggestions = assembler.suggestions
+        if (word, sentence, suggestions) != last_text:
+            info_box.markdown(
+                f"**Current Word:** {word}  \n"
+                f"**Suggestions:** {'  ·  '.join(f'{i + 1}. {s}' for i, s in enumerate(suggestions))}  \n"
+                f"**Sentence:** {sentence}"
+            )
+            last_text = (word, sentence, suggestions)
+        if previewer.show(frame_box, frame, box):
+            pipeline.rendered(t0)
+
+        if time.time() - last_stats > 1.0:
+            report = pipeline.report()
+            fps_box.metric(
+                "Display FPS", f"{report['ui']['fps']:.1f}",
+                f"{previewer.skipped} frames not shown", delta_color="off",
+            )
+            stats_box.table({
+                stage: {k: round(v, 2) if isinstance(v, float) else v for k, v in r.items()}
+                for stage, r in report.items()
+            })
+            tts = speech_stats()
+            if tts is not None:
+                speech_box.json(tts)
+            last_stats = time.time()
 
 # =====================================================
 # ROUTER
 # =====================================================
+metrics.start()
+
+# signed-in pages need a live session token; checked from auth's in-memory
+# cache on every rerun, so the users table is only read when it expires
+PAGE_ROLES = {"app": None, "admin_dashboard": "admin"}
+if st.session_state.page in PAGE_ROLES:
+    current_user = auth.validate(st.session_state.get("token"))
+    required = PAGE_ROLES[st.session_state.page]
+    if current_user is None or (required and current_user["role"] != required):
+        st.session_state.page = "login"
+
 if st.session_state.page == "login":
     login_page()
 elif st.session_state.page == "signup":
@@ -0,0 +1,364 @@
+import argparse
+import base64
+import getpass
+import hashlib
+import hmac
+import os
+import secrets
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import config
+import db
+
+# =====================================================
+# PASSWORD HASHING
+# =====================================================
+# Stored as "scrypt$n$r$p$salt$hash" or "pbkdf2_sha256$iterations$salt$hash"
+# (base64 fields). The worker pool caps how many hashes run at once, so a
+# burst of logins can't take every core; both KDFs release the GIL, so other
+# sessions keep running meanwhile. The session that is logging in still
+# waits for its own hash (login() blocks; the apps show a spinner).
+
+# stored costs above these are treated as corrupt rather than computed
+MAX_SCRYPT_N = 2 ** 20
+MAX_PBKDF2_ITERATIONS = 10_000_000
+
+_executor = ThreadPoolExecutor(max_workers=config.AUTH_WORKERS, thread_name_prefix="auth")
+_dummy_hash = None
+
+
+def _b64(raw):
+    return base64.b64encode(raw).decode()
+
+
+def _unb64(text):
+    return base64.b64decode(text)
+
+
+def _scrypt(password, salt, n, r, p):
+    # 128 * n * r bytes of working memory, plus headroom over hashlib's 32 MiB default
+    return hashlib.scrypt(password.encode(), salt=salt, n=n, r=r, p=p, maxmem=256 * n * r + 2 ** 20, dklen=32)
+
+
+def hash_password(password, scheme=config.AUTH_SCHEME):
+    salt = secrets.token_bytes(16)
+    if scheme == "scrypt":
+        n, r, p = config.AUTH_SCRYPT_N, 8, 1
+        return f"scrypt${n}${r}${p}${_b64(salt)}${_b64(_scrypt(password, salt, n, r, p))}"
+    if scheme == "pbkdf2":
+        iterations = config.AUTH_PBKDF2_ITERATIONS
+        digest = hashlib.pbkdf2_hmac("sha256", password.encode(), salt, iterations)
+        return f"pbkdf2_sha256${iterations}${_b64(salt)}${_b64(digest)}"
+    raise ValueError(f"unknown password scheme {scheme!r}, expected one of {config.AUTH_SCHEMES}")
+
+
+def is_hashed(stored):
+    return stored is not None and stored.startswith(("scrypt$", "pbkdf2_sha256$"))
+
+
+def verify_password(password, stored):
+    """True if `password` matches `stored`; rows not migrated yet hold plaintext and are compared as such."""
+    if stored is None:
+        return False
+    parts = stored.split("$")
+    try:
+        if parts[0] == "scrypt" and len(parts) == 6:
+            n, r, p = (int(x) for x in parts[1:4])
+            if n > MAX_SCRYPT_N or r > 64 or p > 16:
+                return False
+            digest = _scrypt(password, _unb64(parts[4]), n, r, p)
+        elif parts[0] == "pbkdf2_sha256" and len(parts) == 4:
+            iterations = int(parts[1])
+            if iterations > MAX_PBKDF2_ITERATIONS:
+                return False
+            digest = hashlib.pbkdf2_hmac("sha256", password.encode(), _unb64(parts[2]), iterations)
+        else:
+            return hmac.compare_digest(password.encode(), stored.encode())
+        return hmac.compare_digest(digest, _unb64(parts[-1]))
+    except ValueError:
+        # corrupt hash (bad base64 is a ValueError too): treat as a wrong password
+        return False
+
+
+def needs_rehash(stored, scheme=config.AUTH_SCHEME):
+    """True for plaintext, another scheme, or weaker parameters than configured."""
+    if not is_hashed(stored):
+        return True
+    parts = stored.split("$")
+    try:
+        cost = int(parts[1])
+    except (IndexError, ValueError):
+        return True
+    if scheme == "scrypt":
+        return parts[0] != "scrypt" or cost < config.AUTH_SCRYPT_N
+    return parts[0] != "pbkdf2_sha256" or cost < config.AUTH_PBKDF2_ITERATIONS
+
+
+def _dummy():
+    # unknown emails still pay for one hash, so timing doesn't reveal which accounts exist
+    global _dummy_hash
+    if _dummy_hash is None:
+        _dummy_hash = hash_password(secrets.token_hex(8))
+    return _dummy_hash
+
+
+# =====================================================
+# LOGIN RATE LIMIT
+# =====================================================
+class RateLimiter:
+    """Token bucket per key: `burst` attempts, refilled evenly over `window` seconds."""
+
+    def __init__(self, burst=config.AUTH_RATE_BURST, window=config.AUTH_RATE_WINDOW, max_keys=100000):
+        self.burst = burst
+        self.rate = burst / window
+        self.max_keys = max_keys
+        self.buckets = {}
+        self.lock = threading.Lock()
+
+    def _tokens(self, key, now):
+        tokens, last = self.buckets.get(key, (self.burst, now))
+        return min(self.burst, tokens + (now - last) * self.rate)
+
+    def allow(self, key, now=None):
+        now = time.monotonic() if now is None else now
+        with self.lock:
+            tokens = self._tokens(key, now)
+            allowed = tokens >= 1
+            self.buckets[key] = (tokens - 1 if allowed else tokens, now)
+            if len(self.buckets) > self.max_keys:
+                # full buckets carry no state worth keeping
+                self.buckets = {k: v for k, v in self.buckets.items() if self._tokens(k, now) < self.burst}
+            return allowed
+
+    def retry_after(self, key, now=None):
+        now = time.monotonic() if now is None else now
+        with self.lock:
+            return max(0.0, (1 - self._tokens(key, now)) / self.rate)
+
+    def reset(self, key):
+        with self.lock:
+            self.buckets.pop(key, None)
+
+
+# =====================================================
+# SESSION TOKENS
+# =====================================================
+# "<base64 email|expiry|nonce>.<base64 HMAC-SHA256>". validate() checks the
+# signature and looks the user up once, then trusts the token from memory for
+# AUTH_CACHE_TTL seconds, so Streamlit reruns don't touch the users table.
+# Role changes and deleted accounts take effect within that TTL.
+
+_secret = None
+_secret_lock = threading.Lock()
+
+
+def _signing_key():
+    global _secret
+    with _secret_lock:
+        if _secret is None:
+            if config.AUTH_SECRET:
+                _secret = config.AUTH_SECRET.encode()
+            else:
+                try:
+                    with open(config.AUTH_SECRET_FILE, "rb") as f:
+                        _secret = f.read()
+                except FileNotFoundError:
+                    _secret = secrets.token_bytes(32)
+                    fd = os.open(config.AUTH_SECRET_FILE, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+                    with os.fdopen(fd, "wb") as f:
+                        f.write(_secret)
+        return _secret
+
+
+def _sign(payload):
+    return base64.urlsafe_b64encode(hmac.new(_signing_key(), payload.encode(), hashlib.sha256).digest()).decode()
+
+
+def issue_token(email, ttl=config.AUTH_TOKEN_TTL, now=None):
+    expires = int((time.time() if now is None else now) + ttl)
+    payload = base64.urlsafe_b64encode(f"{email}|{expires}|{secrets.token_hex(8)}".encode()).decode()
+    return f"{payload}.{_sign(payload)}"
+
+
+class TokenCache:
+    """token -> (user, trusted until).
+
+    Entries past their time are dropped on access, and all of them are swept
+    at most once per `ttl` when new tokens are added, so tokens of sessions
+    that never come back don't accumulate.
+    """
+
+    def __init__(self, ttl=config.AUTH_CACHE_TTL):
+        self.ttl = ttl
+        self.entries = {}
+        self.revoked = {}
+        self.next_sweep = 0.0
+        self.lock = threading.Lock()
+
+    def get(self, token, now):
+        with self.lock:
+            entry = self.entries.get(token)
+            if entry is None:
+                return None
+            if entry[1] <= now:
+                del self.entries[token]
+                return None
+            return entry[0]
+
+    def put(self, token, user, expires, now):
+        with self.lock:
+            if now >= self.next_sweep:
+                self.entries = {t: e for t, e in self.entries.items() if e[1] > now}
+                self.next_sweep = now + self.ttl
+            if token not in self.revoked:
+                self.entries[token] = (user, min(now + self.ttl, expires))
+
+    def revoke(self, token, expires):
+        with self.lock:
+            self.entries.pop(token, None)
+            self.revoked[token] = expires
+            now = time.time()
+            self.revoked = {t: e for t, e in self.revoked.items() if e > now}
+
+    def is_revoked(self, token):
+        with self.lock:
+            return token in self.revoked
+
+
+def _parse(token):
+    """(email, expiry) if the signature is valid, else None."""
+    try:
+        payload, signature = token.split(".")
+        if not hmac.compare_digest(signature, _sign(payload)):
+            return None
+        email, expires, _ = base64.urlsafe_b64decode(payload).decode().rsplit("|", 2)
+        return email, int(expires)
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+
+def _user(row):
+    user_id, name, email, _, role = row
+    return {"id": user_id, "name": name, "email": email, "role": role or "user"}
+
+
+# =====================================================
+# PROCESS-WIDE STATE
+# =====================================================
+_limiter = RateLimiter()
+_tokens = TokenCache()
+
+
+class LoginError(Exception):
+    """Rejected login; the message is safe to show to the user."""
+
+
+def login(email, password, role=None, timeout=30.0):
+    """(token, user) for valid credentials, with `role` required if given; raises LoginError.
+
+    Blocks the caller for one password hash (run on the bounded worker
+    pool, see above); call it from a script thread, not an event loop.
+    Plaintext and outdated hashes are upgraded in the background after a
+    successful login.
+    """
+    key = email.strip().lower()
+    if not _limiter.allow(key):
+        raise LoginError(f"Too many login attempts, try again in {_limiter.retry_after(key):.0f}s")
+    row = db.find_user(email)
+    stored = row[3] if row else _dummy()
+    if not _executor.submit(verify_password, password, stored).result(timeout) or row is None:
+        raise LoginError("Invalid credentials")
+    user = _user(row)
+    if role is not None and user["role"] != role:
+        raise LoginError("Invalid credentials")
+    _limiter.reset(key)
+    if needs_rehash(stored):
+        _executor.submit(_upgrade, email, password, stored)
+    token = issue_token(email)
+    _tokens.put(token, user, time.time() + config.AUTH_TOKEN_TTL, time.time())
+    return token, user
+
+
+def _upgrade(email, password, stored):
+    db.update_password(email, hash_password(password), stored)
+
+
+def validate(token, now=None):
+    """The user dict a token was issued to, or None if it is invalid, expired, revoked or the user is gone."""
+    if not token:
+        return None
+    now = time.time() if now is None else now
+    user = _tokens.get(token, now)
+    if user is not None:
+        return user
+    parsed = _parse(token)
+    if parsed is None or parsed[1] <= now or _tokens.is_revoked(token):
+        return None
+    row = db.find_user(parsed[0])
+    if row is None:
+        return None
+    user = _user(row)
+    _tokens.put(token, user, parsed[1], now)
+    return user
+
+
+def logout(token):
+    if token:
+        parsed = _parse(token)
+        _tokens.revoke(token, parsed[1] if parsed else time.time())
+
+
+def register(name, email, password, role="user", timeout=30.0):
+    """Create a user with a hashed password; raises sqlite3.IntegrityError if the email is taken."""
+    db.create_user(name, email, _executor.submit(hash_password, password).result(timeout), role)
+
+
+def migrate_passwords():
+    """Hash every plaintext password in place; returns the number of rows migrated."""
+    rows = [(email, stored) for email, stored in db.user_passwords() if stored is not None and not is_hashed(stored)]
+    hashes = _executor.map(hash_password, [stored for _, stored in rows])
+    return sum(db.update_password(email, new, old) for (email, old), new in zip(rows, hashes))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="User accounts and password maintenance")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    sub.add_parser("migrate", help="hash plaintext passwords left from before auth.py")
+    add = sub.add_parser("add-user", help="create an account (prompts for the password)")
+    add.add_argument("email")
+    add.add_argument("name")
+    add.add_argument("--role", default="user", choices=["user", "admin"])
+    role = sub.add_parser("set-role", help="grant or revoke admin access")
+    role.add_argument("email")
+    role.add_argument("role", choices=["user", "admin"])
+    bench = sub.add_parser("bench", help="time one hash at the configured cost")
+    bench.add_argument("--scheme", choices=config.AUTH_SCHEMES, default=config.AUTH_SCHEME)
+    args = parser.parse_args()
+
+    if args.cmd == "migrate":
+        t0 = time.perf_counter()
+        print(f"migrated {migrate_passwords()} passwords in {time.perf_counter() - t0:.1f}s")
+    elif args.cmd == "add-user":
+        password = getpass.getpass("Password: ")
+        if password != getpass.getpass("Repeat: "):
+            raise SystemExit("passwords differ")
+        try:
+            register(args.name, args.email, password, args.role)
+        except sqlite3.IntegrityError:
+            raise SystemExit(f"{args.email} already exists")
+        print(f"created {args.role} {args.email}")
+    elif args.cmd == "set-role":
+        if not db.set_role(args.email, args.role):
+            raise SystemExit(f"no user {args.email}")
+        print(f"{args.email} is now {args.role}")
+    else:
+        t0 = time.perf_counter()
+        stored = hash_password("benchmark", args.scheme)
+        print(f"{stored.split('$')[0]}: {1000 * (time.perf_counter() - t0):.0f} ms per hash")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+import argparse
+import json
+import platform
+import sys
+import time
+import types
+
+import cv2
+import numpy as np
+
+import config
+import registry
+
+try:
+    import resource
+except ImportError:
+    # Windows; peak memory comes from psutil (an ultralytics dependency) instead
+    resource = None
+from gating import PoseGate
+from preview import Previewer
+from recognition import hand_box, make_assembler, observe_hand
+
+# "classify" is observe_hand(): motion gate, crop, recognizer.probs (or
+# top-1 for the "stable" decoder) and the letter decoder, as in the pipeline
+STAGES = ("flip", "cvtcolor", "hands", "box", "classify", "preview")
+
+
+# =====================================================
+# INPUT FRAMES
+# =====================================================
+def synthetic_frames(n, width=640, height=480, seed=0):
+    rng = np.random.default_rng(seed)
+    base = rng.integers(0, 256, (height, width, 3), dtype=np.uint8)
+    for i in range(n):
+        # shift a little every frame so nothing gets cached by accident
+        yield np.roll(base, i, axis=1)
+
+
+def recorded_frames(source, n):
+    from replay import iter_frames
+
+    for i, (_, frame) in enumerate(iter_frames(source)):
+        if i >= n:
+            break
+        yield frame
+
+
+def synthetic_hand():
+    """Centered, hand-sized landmark set used when no hand is detected."""
+    rng = np.random.default_rng(1)
+    pts = 0.35 + 0.3 * rng.random((21, 3))
+    return types.SimpleNamespace(landmark=[types.SimpleNamespace(x=x, y=y, z=z) for x, y, z in pts])
+
+
+# =====================================================
+# BENCHMARK
+# =====================================================
+def run(frames, recognizer, hands, warmup=10, gate=True):
+    """Time each hot-path stage of the live RecognitionPipeline for every frame."""
+    timings = {stage: [] for stage in STAGES}
+    assembler = make_assembler(recognizer.names)
+    pose_gate = PoseGate() if gate else None
+    previewer = Previewer()
+    fallback = synthetic_hand()
+    detected = 0
+    total = 0.0
+
+    for i, frame in enumerate(frames):
+        t = [time.perf_counter()]
+        frame = cv2.flip(frame, 1)
+        t.append(time.perf_counter())
+        rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        t.append(time.perf_counter())
+        result = hands.process(rgb)
+        t.append(time.perf_counter())
+
+        landmarks = result.multi_hand_landmarks[0] if result.multi_hand_landmarks else fallback
+        box = hand_box(frame, landmarks)
+        t.append(time.perf_counter())
+        observe_hand(assembler, recognizer, frame, landmarks, t[-1], pose_gate)
+        t.append(time.perf_counter())
+        # the downscaled JPEG/WebP the UI actually sends, not the full frame
+        previewer.encode(frame, box)
+        t.append(time.perf_counter())
+
+        if i < warmup:
+            continue
+        detected += landmarks is not fallback
+        total += t[-1] - t[0]
+        for stage, start, end in zip(STAGES, t, t[1:]):
+            timings[stage].append(end - start)
+
+    n = len(timings["flip"])
+    report = {"frames": n, "hand_detected": detected, "fps": n / total if total else 0.0,
+              "gated": pose_gate.skipped if gate else 0, "stages": {}}
+    for stage, values in timings.items():
+        ms = np.array(values) * 1000
+        report["stages"][stage] = {
+            "mean_ms": float(ms.mean()) if n else 0.0,
+            "p50_ms": float(np.percentile(ms, 50)) if n else 0.0,
+            "p90_ms": float(np.percentile(ms, 90)) if n else 0.0,
+            "p99_ms": float(np.percentile(ms, 99)) if n else 0.0,
+        }
+    report["peak_rss_mb"] = peak_rss_mb()
+    return report
+
+
+def peak_rss_mb():
+    """Peak resident memory of this process in MB, or None if it can't be measured here."""
+    if resource is not None:
+        # ru_maxrss is KiB on Linux, bytes on macOS
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return rss / (1024 * 1024 if sys.platform == "darwin" else 1024)
+    try:
+        import psutil
+    except ImportError:
+        return None
+    info = psutil.Process().memory_info()
+    # peak working set on Windows; current RSS elsewhere
+    return getattr(info, "peak_wset", info.rss) / (1024 * 1024)
+
+
+def compare(report, baseline, tolerance):
+    """Print stage-by-stage changes; return the list of regressions beyond tolerance."""
+    regressions = []
+    print(f"{'stage':<10} {'base p50':>9} {'now p50':>9} {'change':>8}")
+    for stage, now in report["stages"].items():
+        base = baseline["stages"].get(stage)
+        if not base or not base["p50_ms"]:
+            continue
+        change = now["p50_ms"] / base["p50_ms"] - 1
+        flag = " REGRESSION" if change > tolerance else ""
+        print(f"{stage:<10} {base['p50_ms']:>9.3f} {now['p50_ms']:>9.3f} {change:>+8.1%}{flag}")
+        if flag:
+            regressions.append(stage)
+    fps_change = report["fps"] / baseline["fps"] - 1 if baseline.get("fps") else 0.0
+    print(f"fps {baseline.get('fps', 0):.1f} -> {report['fps']:.1f} ({fps_change:+.1%})")
+    if fps_change < -tolerance:
+        regressions.append("fps")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-stage benchmark of the sign-to-sentence hot path")
+    parser.add_argument("--source", help="video file or frame folder (default: synthetic frames)")
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--recognizer", choices=config.RECOGNIZERS, default=config.RECOGNIZER)
+    parser.add_argument("--no-gate", action="store_true", help="run the recognizer on every frame")
+    parser.add_argument("--save", help="write the report as a JSON baseline")
+    parser.add_argument("--baseline", help="compare against a saved baseline")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="allowed slowdown before failing")
+    args = parser.parse_args()
+
+    total = args.frames + args.warmup
+    frames = recorded_frames(args.source, total) if args.source else synthetic_frames(total)
+    recognizer = registry.get_recognizer(args.recognizer)
+    with registry.create_hands() as hands:
+        report = run(frames, recognizer, hands, args.warmup, gate=not args.no_gate)
+
+    report["config"] = {
+        "source": args.source or "synthetic",
+        "recognizer": args.recognizer,
+        "decoder": config.DECODER,
+        "gate": not args.no_gate,
+        "preview": f"{config.PREVIEW_FORMAT} {config.PREVIEW_WIDTH}px",
+        "backend": config.BACKEND,
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+    print(json.dumps(report, indent=2))
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(report, json.load(f), args.tolerance)
+        if regressions:
+            sys.exit(f"regressed: {', '.join(regressions)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+import os
+
+# =====================================================
+# RECOGNITION SETTINGS (override with S2S_* env vars)
+# =====================================================
+MODEL_PATH = os.environ.get("S2S_MODEL_PATH", "runs/classify/train/weights/best.pt")
+CONF_THRESHOLD = float(os.environ.get("S2S_CONF_THRESHOLD", 0.85))
+STABLE_FRAMES = int(os.environ.get("S2S_STABLE_FRAMES", 10))
+SPACE_TIME = float(os.environ.get("S2S_SPACE_TIME", 2.0))
+
+# how per-frame predictions become letters: "window" smooths full probability
+# vectors over DECODER_WINDOW frames and commits a letter when its mean score
+# rises above DECODER_ENTER; it can commit again only after falling below
+# DECODER_EXIT (hysteresis). "stable" is the old STABLE_FRAMES counter.
+DECODERS = ("window", "stable")
+DECODER = os.environ.get("S2S_DECODER", "window")
+DECODER_WINDOW = int(os.environ.get("S2S_DECODER_WINDOW", 6))
+DECODER_ENTER = float(os.environ.get("S2S_DECODER_ENTER", 0.6))
+DECODER_EXIT = float(os.environ.get("S2S_DECODER_EXIT", 0.4))
+
+# word completion: ranked word list, where its compiled trie is cached, how
+# many suggestions to offer, and the spelling-correction search limits (an
+# edit costs LEXICON_EDIT_COST in log frequency). With LEXICON_AUTOCORRECT a
+# word that ends unknown is replaced by its closest known word.
+LEXICON_WORDS = os.environ.get("S2S_LEXICON_WORDS", "words.txt")
+LEXICON_DIR = os.environ.get("S2S_LEXICON_DIR", ".lexicon")
+SUGGESTIONS = int(os.environ.get("S2S_SUGGESTIONS", 3))
+LEXICON_MAX_EDITS = int(os.environ.get("S2S_LEXICON_MAX_EDITS", 1))
+LEXICON_BUDGET_MS = float(os.environ.get("S2S_LEXICON_BUDGET_MS", 2.0))
+LEXICON_EDIT_COST = float(os.environ.get("S2S_LEXICON_EDIT_COST", 3.0))
+LEXICON_AUTOCORRECT = os.environ.get("S2S_LEXICON_AUTOCORRECT", "0") == "1"
+
+CAMERA_INDEX = int(os.environ.get("S2S_CAMERA_INDEX", 0))
+IMGSZ = int(os.environ.get("S2S_IMGSZ", 224))
+
+# "yolo" crops the hand and runs the image classifier,
+# "landmarks" classifies the 21 MediaPipe points directly
+RECOGNIZERS = ("yolo", "landmarks")
+RECOGNIZER = os.environ.get("S2S_RECOGNIZER", "yolo")
+LANDMARK_MODEL_PATH = os.environ.get("S2S_LANDMARK_MODEL_PATH", "runs/landmarks/landmark_model.npz")
+
+# MediaPipe runs in tracking mode: palm detection only reruns when tracking is lost
+HANDS_COMPLEXITY = int(os.environ.get("S2S_HANDS_COMPLEXITY", 1))
+HANDS_DETECTION_CONF = float(os.environ.get("S2S_HANDS_DETECTION_CONF", 0.5))
+HANDS_TRACKING_CONF = float(os.environ.get("S2S_HANDS_TRACKING_CONF", 0.5))
+
+# motion gate: reuse the last prediction while the pose moves less than this
+POSE_TOLERANCE = float(os.environ.get("S2S_POSE_TOLERANCE", 0.03))
+POSE_MAX_REUSE = int(os.environ.get("S2S_POSE_MAX_REUSE", 15))
+MIN_ROI_SIZE = int(os.environ.get("S2S_MIN_ROI_SIZE", 16))
+
+# classifier runtime: "torch" (ultralytics), "onnx", "onnx-int8" or "openvino"
+# (onnxruntime with the OpenVINO execution provider); export with export_onnx.py.
+# "remote" sends crops to a shared inference_server.py at INFERENCE_ADDR
+BACKENDS = ("torch", "onnx", "onnx-int8", "openvino", "remote")
+BACKEND = os.environ.get("S2S_BACKEND", "torch")
+ONNX_MODEL_PATH = os.environ.get("S2S_ONNX_MODEL_PATH", os.path.splitext(MODEL_PATH)[0] + ".onnx")
+ONNX_INT8_MODEL_PATH = os.environ.get("S2S_ONNX_INT8_MODEL_PATH", os.path.splitext(MODEL_PATH)[0] + ".int8.onnx")
+INFERENCE_ADDR = os.environ.get("S2S_INFERENCE_ADDR", "127.0.0.1:8765")
+# landmark_server.py: WebSocket API taking hand landmarks (or frames) from clients
+LANDMARK_API_ADDR = os.environ.get("S2S_LANDMARK_API_ADDR", "127.0.0.1:8766")
+
+DB_PATH = os.environ.get("S2S_DB_PATH", "database.db")
+
+# recognition event log: every committed letter/word/sentence per user goes
+# to the recognition_events table; `python event_log.py compact` moves rows
+# older than EVENT_KEEP_DAYS into Parquet files under EVENT_ARCHIVE_DIR
+EVENT_LOG = os.environ.get("S2S_EVENT_LOG", "1") == "1"
+EVENT_KEEP_DAYS = int(os.environ.get("S2S_EVENT_KEEP_DAYS", 7))
+EVENT_ARCHIVE_DIR = os.environ.get("S2S_EVENT_ARCHIVE_DIR", "event_archive")
+
+# password hashing (auth.py): "scrypt" or "pbkdf2"; stored hashes carry their own
+# parameters, so raising the cost only rehashes each user on their next login
+AUTH_SCHEMES = ("scrypt", "pbkdf2")
+AUTH_SCHEME = os.environ.get("S2S_AUTH_SCHEME", "scrypt")
+AUTH_SCRYPT_N = int(os.environ.get("S2S_AUTH_SCRYPT_N", 2 ** 15))
+AUTH_PBKDF2_ITERATIONS = int(os.environ.get("S2S_AUTH_PBKDF2_ITERATIONS", 600000))
+AUTH_WORKERS = int(os.environ.get("S2S_AUTH_WORKERS", 4))
+# session tokens: signing key (generated into AUTH_SECRET_FILE if unset),
+# lifetime, and how long a validated token is trusted without a users lookup
+AUTH_SECRET = os.environ.get("S2S_AUTH_SECRET", "")
+AUTH_SECRET_FILE = os.environ.get("S2S_AUTH_SECRET_FILE", ".auth_secret")
+AUTH_TOKEN_TTL = float(os.environ.get("S2S_AUTH_TOKEN_TTL", 12 * 3600))
+AUTH_CACHE_TTL = float(os.environ.get("S2S_AUTH_CACHE_TTL", 60))
+# login attempts allowed per email within AUTH_RATE_WINDOW seconds
+AUTH_RATE_BURST = int(os.environ.get("S2S_AUTH_RATE_BURST", 5))
+AUTH_RATE_WINDOW = float(os.environ.get("S2S_AUTH_RATE_WINDOW", 60))
+
+# preprocessed hand crops and landmarks of the dataset (crop_cache.py)
+CROP_CACHE_DIR = os.environ.get("S2S_CROP_CACHE_DIR", ".crop_cache")
+
+# import OpenCV/MediaPipe/the model and load them in the background right
+# after login, so the live page is ready by the time it opens
+PREWARM = os.environ.get("S2S_PREWARM", "1") == "1"
+
+# Prometheus text endpoint on 127.0.0.1 (0 disables) and how often rolling
+# stage timings are written to the perf_metrics table, in seconds
+METRICS_PORT = int(os.environ.get("S2S_METRICS_PORT", 9464))
+METRICS_PERSIST_EVERY = float(os.environ.get("S2S_METRICS_PERSIST_EVERY", 60))
+
+# live preview, independent of the recognition frame rate
+PREVIEW_FPS = float(os.environ.get("S2S_PREVIEW_FPS", 15))
+PREVIEW_WIDTH = int(os.environ.get("S2S_PREVIEW_WIDTH", 480))
+PREVIEW_FORMAT = os.environ.get("S2S_PREVIEW_FORMAT", "jpeg")
+PREVIEW_QUALITY = int(os.environ.get("S2S_PREVIEW_QUALITY", 70))
+PREVIEW_DRAW_BOX = os.environ.get("S2S_PREVIEW_DRAW_BOX", "1") == "1"
+
+# text-to-speech: "edge" (online) or "offline" (local stand-in engine)
+TTS_ENGINE = os.environ.get("S2S_TTS_ENGINE", "edge")
+TTS_VOICE = os.environ.get("S2S_TTS_VOICE", "en-US-AriaNeural")
+TTS_RATE = os.environ.get("S2S_TTS_RATE", "+0%")
+TTS_CACHE_DIR = os.environ.get("S2S_TTS_CACHE_DIR", ".tts_cache")
+TTS_MEMORY_MB = int(os.environ.get("S2S_TTS_MEMORY_MB", 32))
+TTS_DISK_MB = int(os.environ.get("S2S_TTS_DISK_MB", 256))
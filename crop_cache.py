@@ -0,0 +1,267 @@
+import argparse
+import json
+import os
+import time
+
+import cv2
+import numpy as np
+
+import config
+from landmark_classifier import landmark_features
+from onnx_backend import fit_crop
+from recognition import hand_box
+from train_landmarks import IMAGE_EXTS, class_names
+
+# =====================================================
+# PREPROCESSED HAND-CROP CACHE
+# =====================================================
+# Hand detection runs once per dataset image. The hand is cropped with the
+# same hand_box() the live page uses and fitted to imgsz with the same
+# resize/center crop as inference, so training sees what the model sees.
+# Each split directory holds append-only raw arrays
+#   crops.u8       (rows, imgsz, imgsz, 3) uint8 BGR
+#   landmarks.f32  (rows, 63) float32 normalized landmarks
+#   labels.i16     (rows,) int16 class ids
+# plus index.json mapping every image to its row (-1: no hand found), so an
+# update only processes new or modified files. Replaced and deleted images
+# leave dead rows behind until `compact`.
+
+ROW_FILES = {"crops": ("crops.u8", np.uint8), "landmarks": ("landmarks.f32", np.float32),
+             "labels": ("labels.i16", np.int16)}
+
+
+def _load_index(split_dir):
+    try:
+        with open(os.path.join(split_dir, "index.json")) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def _save_index(split_dir, index):
+    tmp = os.path.join(split_dir, "index.json.tmp")
+    with open(tmp, "w") as f:
+        json.dump(index, f)
+    os.replace(tmp, os.path.join(split_dir, "index.json"))
+
+
+def _row_shapes(imgsz):
+    return {"crops": (imgsz, imgsz, 3), "landmarks": (63,), "labels": ()}
+
+
+def scan(image_dir, names):
+    """{relative path: (label, mtime_ns, size)} for every image under the class folders."""
+    found = {}
+    for label, name in enumerate(names):
+        class_dir = os.path.join(image_dir, name)
+        if not os.path.isdir(class_dir):
+            continue
+        for entry in sorted(os.scandir(class_dir), key=lambda e: e.name):
+            if entry.name.lower().endswith(IMAGE_EXTS):
+                st = entry.stat()
+                found[f"{name}/{entry.name}"] = (label, st.st_mtime_ns, st.st_size)
+    return found
+
+
+def update_split(hands, image_dir, split_dir, names, imgsz=config.IMGSZ):
+    """Bring one split's cache up to date with `image_dir`; returns counts of what changed."""
+    os.makedirs(split_dir, exist_ok=True)
+    index = _load_index(split_dir)
+    if index is None or index["imgsz"] != imgsz or index["names"] != names:
+        for fname, _ in ROW_FILES.values():
+            open(os.path.join(split_dir, fname), "wb").close()
+        index = {"imgsz": imgsz, "names": names, "rows": 0, "files": {}}
+
+    # bytes past index["rows"] are rows written after the last checkpoint of a
+    # killed run; drop them so appended rows land at the ids the index gives
+    # them. If a file is short instead (lost unsynced writes), forget the
+    # images whose rows are gone so they are processed again.
+    row_bytes = {key: int(np.prod(shape, dtype=np.int64)) * np.dtype(ROW_FILES[key][1]).itemsize
+                 for key, shape in _row_shapes(imgsz).items()}
+    paths = {key: os.path.join(split_dir, fname) for key, (fname, _) in ROW_FILES.items()}
+    on_disk = [(os.path.getsize(p) if os.path.exists(p) else 0) // row_bytes[key] for key, p in paths.items()]
+    valid = min([index["rows"]] + on_disk)
+    if valid < index["rows"]:
+        index["files"] = {path: e for path, e in index["files"].items() if e[0] < valid}
+        index["rows"] = valid
+    for key, path in paths.items():
+        with open(path, "ab") as f:
+            f.truncate(valid * row_bytes[key])
+
+    found = scan(image_dir, names)
+    files = index["files"]
+    removed = [path for path in files if path not in found]
+    for path in removed:
+        del files[path]
+    todo = [path for path, (_, mtime, size) in found.items()
+            if path not in files or files[path][1:] != [mtime, size]]
+
+    outs = {key: open(os.path.join(split_dir, fname), "ab") for key, (fname, _) in ROW_FILES.items()}
+    added = no_hand = 0
+    try:
+        for n, path in enumerate(todo, 1):
+            label, mtime, size = found[path]
+            img = cv2.imread(os.path.join(image_dir, path))
+            row = -1
+            if img is not None:
+                result = hands.process(cv2.cvtColor(img, cv2.COLOR_BGR2RGB))
+                box = hand_box(img, result.multi_hand_landmarks[0]) if result.multi_hand_landmarks else None
+                if box is not None:
+                    x0, y0, x1, y1 = box
+                    outs["crops"].write(np.ascontiguousarray(fit_crop(img[y0:y1, x0:x1], imgsz)).tobytes())
+                    outs["landmarks"].write(
+                        landmark_features(result.multi_hand_landmarks[0]).astype(np.float32).tobytes())
+                    outs["labels"].write(np.int16(label).tobytes())
+                    row = index["rows"]
+                    index["rows"] += 1
+                    added += 1
+            no_hand += row < 0
+            files[path] = [row, mtime, size]
+            # checkpoint so an interrupted run resumes where it stopped
+            if n % 500 == 0:
+                for f in outs.values():
+                    f.flush()
+                _save_index(split_dir, index)
+    finally:
+        for f in outs.values():
+            f.close()
+        _save_index(split_dir, index)
+    return {"scanned": len(found), "processed": len(todo), "added": added,
+            "no_hand": no_hand, "removed": len(removed)}
+
+
+def compact(split_dir):
+    """Rewrite a split without dead rows."""
+    index = _load_index(split_dir)
+    data = CropSplit(split_dir)
+    live = data.rows.copy()
+    # close the split's memmaps; Windows can't replace files that are mapped
+    del data
+    remap = {int(old): new for new, old in enumerate(live)}
+    shapes = _row_shapes(index["imgsz"])
+    for key, (fname, dtype) in ROW_FILES.items():
+        arr = np.memmap(os.path.join(split_dir, fname), dtype=dtype, mode="r",
+                        shape=(index["rows"], *shapes[key])) if index["rows"] else None
+        tmp = os.path.join(split_dir, fname + ".tmp")
+        with open(tmp, "wb") as f:
+            for start in range(0, len(live), 1024):
+                f.write(np.ascontiguousarray(arr[live[start:start + 1024]]).tobytes())
+        del arr
+        os.replace(tmp, os.path.join(split_dir, fname))
+    for path, entry in index["files"].items():
+        if entry[0] >= 0:
+            entry[0] = remap[entry[0]]
+    index["rows"] = len(live)
+    _save_index(split_dir, index)
+
+
+# =====================================================
+# READING
+# =====================================================
+class CropSplit:
+    """Memory-mapped view of one cached split; only live rows are exposed."""
+
+    def __init__(self, split_dir):
+        index = _load_index(split_dir)
+        if index is None:
+            raise FileNotFoundError(f"no crop cache in {split_dir}; run `python crop_cache.py build`")
+        self.names = index["names"]
+        self.imgsz = index["imgsz"]
+        self.files = {path: e[0] for path, e in index["files"].items() if e[0] >= 0}
+        self.no_hand = len(index["files"]) - len(self.files)
+        self.rows = np.array(sorted(self.files.values()), dtype=np.int64)
+        shapes = _row_shapes(self.imgsz)
+        arrays = {}
+        for key, (fname, dtype) in ROW_FILES.items():
+            arrays[key] = (np.memmap(os.path.join(split_dir, fname), dtype=dtype, mode="r",
+                                     shape=(index["rows"], *shapes[key]))
+                           if index["rows"] else np.zeros((0, *shapes[key]), dtype=dtype))
+        self.crops = arrays["crops"]
+        self.landmarks = arrays["landmarks"]
+        self.labels = arrays["labels"]
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __getitem__(self, i):
+        row = self.rows[i]
+        return self.crops[row], int(self.labels[row])
+
+    def features(self):
+        """(X, y) landmark features for the live rows, as train_landmarks expects."""
+        return (np.asarray(self.landmarks[self.rows], dtype=np.float32),
+                np.asarray(self.labels[self.rows], dtype=np.int64))
+
+
+def open_split(cache_dir, split):
+    return CropSplit(os.path.join(cache_dir, split))
+
+
+def export_folder(split_dir, out_dir):
+    """Write live crops as an ultralytics classify folder (class/image.png); returns (written, removed).
+
+    Each PNG takes its source image's mtime, so only crops of new or changed
+    images are rewritten. PNGs whose source image is gone are deleted.
+    """
+    data = CropSplit(split_dir)
+    mtimes = {path: e[1] for path, e in _load_index(split_dir)["files"].items()}
+    for name in data.names:
+        os.makedirs(os.path.join(out_dir, name), exist_ok=True)
+    wanted = set()
+    written = 0
+    for src, row in data.files.items():
+        path = os.path.normpath(os.path.join(out_dir, os.path.splitext(src)[0] + ".png"))
+        wanted.add(path)
+        if not os.path.exists(path) or os.stat(path).st_mtime_ns != mtimes[src]:
+            cv2.imwrite(path, np.asarray(data.crops[row]))
+            os.utime(path, ns=(mtimes[src], mtimes[src]))
+            written += 1
+    removed = 0
+    for root, _, names in os.walk(out_dir):
+        for name in names:
+            path = os.path.normpath(os.path.join(root, name))
+            if name.lower().endswith(".png") and path not in wanted:
+                os.remove(path)
+                removed += 1
+    return written, removed
+
+
+def splits(data_dir):
+    return [s for s in ("train", "val", "test") if os.path.isdir(os.path.join(data_dir, s))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cache MediaPipe hand crops of the dataset as memory-mapped arrays")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    build = sub.add_parser("build", help="create or incrementally update the cache")
+    build.add_argument("--imgsz", type=int, default=config.IMGSZ)
+    comp = sub.add_parser("compact", help="drop rows of replaced or deleted images")
+    exp = sub.add_parser("export", help="write crops as a classify folder dataset for ultralytics")
+    exp.add_argument("out")
+    for p in (build, comp, exp):
+        p.add_argument("--data", default="dataset")
+        p.add_argument("--cache", default=config.CROP_CACHE_DIR)
+    args = parser.parse_args()
+
+    if args.cmd == "build":
+        import mediapipe as mp
+
+        names = class_names(os.path.join(args.data, "train"))
+        with mp.solutions.hands.Hands(static_image_mode=True, max_num_hands=1) as hands:
+            for split in splits(args.data):
+                t0 = time.perf_counter()
+                counts = update_split(hands, os.path.join(args.data, split),
+                                      os.path.join(args.cache, split), names, args.imgsz)
+                print(f"{split}: {counts} in {time.perf_counter() - t0:.1f}s")
+    elif args.cmd == "compact":
+        for split in splits(args.cache):
+            compact(os.path.join(args.cache, split))
+            print(f"{split}: {len(open_split(args.cache, split))} rows")
+    else:
+        for split in splits(args.cache):
+            written, removed = export_folder(os.path.join(args.cache, split), os.path.join(args.out, split))
+            print(f"{split}: wrote {written} crops, removed {removed} stale")
+
+
+if __name__ == "__main__":
+    main()
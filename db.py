@@ -0,0 +1,554 @@
+import argparse
+import atexit
+import csv
+import io
+import queue
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+import config
+
+# =====================================================
+# SCHEMA
+# =====================================================
+TRG_LOGIN_DAILY_USERS = """
+    CREATE TRIGGER IF NOT EXISTS trg_login_daily_users AFTER INSERT ON login_daily_users
+    BEGIN
+        UPDATE login_daily SET users = users + 1 WHERE day = NEW.day;
+    END
+    """
+
+SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS users(
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT,
+        email TEXT UNIQUE,
+        password TEXT,
+        role TEXT
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS logins(
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        email TEXT,
+        login_time TEXT
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_logins_email ON logins(email)",
+    "CREATE INDEX IF NOT EXISTS idx_logins_login_time ON logins(login_time)",
+    # per-user history in time order for the paginated Logs view
+    "CREATE INDEX IF NOT EXISTS idx_logins_email_time ON logins(email, login_time)",
+    # login rollups, kept current by triggers in the same transaction as the
+    # insert so dashboard reads never touch the raw logins table
+    """
+    CREATE TABLE IF NOT EXISTS login_daily(
+        day TEXT PRIMARY KEY,
+        logins INTEGER NOT NULL DEFAULT 0,
+        users INTEGER NOT NULL DEFAULT 0
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS login_hourly(
+        hour TEXT PRIMARY KEY,
+        logins INTEGER NOT NULL DEFAULT 0
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS login_daily_users(
+        day TEXT,
+        email TEXT,
+        PRIMARY KEY(day, email)
+    ) WITHOUT ROWID
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_logins_rollup AFTER INSERT ON logins
+    BEGIN
+        INSERT INTO login_daily(day, logins) VALUES(substr(NEW.login_time, 1, 10), 1)
+            ON CONFLICT(day) DO UPDATE SET logins = logins + 1;
+        INSERT INTO login_hourly(hour, logins) VALUES(substr(NEW.login_time, 1, 13), 1)
+            ON CONFLICT(hour) DO UPDATE SET logins = logins + 1;
+        INSERT OR IGNORE INTO login_daily_users(day, email) VALUES(substr(NEW.login_time, 1, 10), NEW.email);
+    END
+    """,
+    TRG_LOGIN_DAILY_USERS,
+    # append-only recognition events (see event_log.py); rows older than
+    # EVENT_KEEP_DAYS move to Parquet, the daily rollup stays here for good
+    """
+    CREATE TABLE IF NOT EXISTS recognition_events(
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        ts TEXT,
+        email TEXT,
+        kind TEXT,
+        value TEXT,
+        conf REAL,
+        frames INTEGER
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS recognition_daily(
+        day TEXT,
+        email TEXT,
+        kind TEXT,
+        events INTEGER NOT NULL DEFAULT 0,
+        conf_sum REAL NOT NULL DEFAULT 0,
+        frames_sum INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY(day, email, kind)
+    ) WITHOUT ROWID
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_recognition_rollup AFTER INSERT ON recognition_events
+    BEGIN
+        INSERT INTO recognition_daily(day, email, kind, events, conf_sum, frames_sum)
+            VALUES(substr(NEW.ts, 1, 10), NEW.email, NEW.kind, 1,
+                   COALESCE(NEW.conf, 0), COALESCE(NEW.frames, 0))
+            ON CONFLICT(day, email, kind) DO UPDATE SET
+                events = events + 1,
+                conf_sum = conf_sum + excluded.conf_sum,
+                frames_sum = frames_sum + excluded.frames_sum;
+    END
+    """,
+    # per-stage pipeline timings rolled up by metrics.py every METRICS_PERSIST_EVERY seconds
+    """
+    CREATE TABLE IF NOT EXISTS perf_metrics(
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        ts TEXT,
+        stage TEXT,
+        streams INTEGER,
+        samples INTEGER,
+        fps REAL,
+        mean_ms REAL,
+        p50_ms REAL,
+        p99_ms REAL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_perf_metrics_ts ON perf_metrics(ts)",
+]
+
+BACKFILL = [
+    "DELETE FROM login_daily",
+    "DELETE FROM login_hourly",
+    "DELETE FROM login_daily_users",
+    """
+    INSERT INTO login_daily(day, logins, users)
+    SELECT substr(login_time, 1, 10), COUNT(*), COUNT(DISTINCT email) FROM logins GROUP BY 1
+    """,
+    """
+    INSERT INTO login_hourly(hour, logins)
+    SELECT substr(login_time, 1, 13), COUNT(*) FROM logins GROUP BY 1
+    """,
+    # the users trigger would double count here; users were set above
+    "DROP TRIGGER trg_login_daily_users",
+    """
+    INSERT OR IGNORE INTO login_daily_users(day, email)
+    SELECT DISTINCT substr(login_time, 1, 10), email FROM logins
+    """,
+    TRG_LOGIN_DAILY_USERS,
+]
+
+# kept as constants so every pooled connection reuses one prepared statement
+# per query from its statement cache
+SQL_FIND_USER = "SELECT id, name, email, password, role FROM users WHERE email=?"
+SQL_UPDATE_PASSWORD = "UPDATE users SET password=? WHERE email=? AND password=?"
+SQL_SET_ROLE = "UPDATE users SET role=? WHERE email=?"
+SQL_USER_PASSWORDS = "SELECT email, password FROM users"
+SQL_INSERT_USER = "INSERT INTO users VALUES(NULL,?,?,?,?)"
+SQL_INSERT_LOGIN = "INSERT INTO logins VALUES(NULL,?,?)"
+SQL_COUNT_USERS = "SELECT COUNT(*) FROM users"
+SQL_DAILY_LOGINS = "SELECT day, logins, users FROM login_daily ORDER BY day"
+SQL_HOURLY_LOGINS = "SELECT hour, logins FROM login_hourly WHERE hour >= ? ORDER BY hour"
+SQL_TOTAL_LOGINS = "SELECT COALESCE(SUM(logins), 0) FROM login_daily"
+SQL_INSERT_EVENT = "INSERT INTO recognition_events VALUES(NULL,?,?,?,?,?,?)"
+SQL_RECOGNITION_BY_USER = """
+    SELECT email,
+           SUM(CASE WHEN kind = 'letter' THEN events ELSE 0 END),
+           SUM(CASE WHEN kind = 'letter' THEN conf_sum ELSE 0 END),
+           SUM(CASE WHEN kind = 'letter' THEN frames_sum ELSE 0 END),
+           SUM(CASE WHEN kind = 'word' THEN events ELSE 0 END),
+           SUM(CASE WHEN kind = 'sentence' THEN events ELSE 0 END)
+    FROM recognition_daily WHERE day >= ? GROUP BY email ORDER BY email
+"""
+SQL_RECOGNITION_DAILY = """
+    SELECT day,
+           SUM(CASE WHEN kind = 'letter' THEN events ELSE 0 END),
+           SUM(CASE WHEN kind = 'word' THEN events ELSE 0 END),
+           SUM(CASE WHEN kind = 'sentence' THEN events ELSE 0 END)
+    FROM recognition_daily WHERE day >= ? GROUP BY day ORDER BY day
+"""
+SQL_EVENTS_BEFORE = ("SELECT id, ts, email, kind, value, conf, frames FROM recognition_events "
+                     "WHERE id > ? AND ts < ? ORDER BY id LIMIT ?")
+SQL_DELETE_EVENTS = "DELETE FROM recognition_events WHERE id > ? AND id <= ? AND ts < ?"
+
+
+# =====================================================
+# CONNECTION POOL
+# =====================================================
+def _open(path):
+    conn = sqlite3.connect(path, check_same_thread=False, timeout=30, cached_statements=256)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA busy_timeout=30000")
+    return conn
+
+
+class Pool:
+    """Hands each thread its own connection for the duration of a `with` block.
+
+    WAL mode lets readers run alongside the single writer, so sessions no
+    longer serialize on one shared cursor.
+    """
+
+    def __init__(self, path=config.DB_PATH, size=8):
+        self.path = path
+        self.size = size
+        self.idle = queue.LifoQueue()
+        self.created = 0
+        self.lock = threading.Lock()
+        with self.connection() as conn:
+            for stmt in SCHEMA:
+                conn.execute(stmt)
+            # first start with rollups: build them from existing history
+            if (conn.execute("SELECT 1 FROM logins LIMIT 1").fetchone()
+                    and not conn.execute("SELECT 1 FROM login_daily LIMIT 1").fetchone()):
+                backfill_rollups(conn)
+
+    @contextmanager
+    def connection(self):
+        try:
+            conn = self.idle.get_nowait()
+        except queue.Empty:
+            with self.lock:
+                grow = self.created < self.size
+                if grow:
+                    self.created += 1
+            conn = _open(self.path) if grow else self.idle.get()
+        try:
+            with conn:
+                yield conn
+        finally:
+            self.idle.put(conn)
+
+
+def backfill_rollups(conn):
+    """Rebuild the login rollup tables from the raw logins table."""
+    for stmt in BACKFILL:
+        conn.execute(stmt)
+
+
+# =====================================================
+# BACKGROUND WRITER
+# =====================================================
+class _Locked(Exception):
+    """The database stayed locked through every retry."""
+
+
+class BatchWriter:
+    """Collects high-frequency inserts and writes them in one transaction per batch."""
+
+    def __init__(self, pool, max_batch=500, max_wait=0.05):
+        self.pool = pool
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.items = queue.Queue()
+        self.idle = threading.Condition()
+        self.in_flight = 0
+        self.dropped = 0
+        self.last_error = None
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def put(self, sql, params):
+        with self.idle:
+            self.in_flight += 1
+        self.items.put((sql, params))
+
+    def flush(self, timeout=10.0):
+        """Block until everything queued so far is committed."""
+        with self.idle:
+            return self.idle.wait_for(lambda: self.in_flight == 0, timeout)
+
+    def _run(self):
+        while True:
+            batch = [self.items.get()]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self.items.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            try:
+                self._write(batch)
+            except _Locked:
+                self.dropped += len(batch)
+            except Exception:
+                # one bad row must not cost the rest of the batch (or the
+                # writer thread); retry row by row so only it is dropped
+                for item in batch:
+                    try:
+                        self._write([item])
+                    except Exception:
+                        self.dropped += 1
+            finally:
+                with self.idle:
+                    self.in_flight -= len(batch)
+                    self.idle.notify_all()
+
+    def _write(self, batch):
+        """Commit `batch` in one transaction, retrying while the database is locked."""
+        grouped = {}
+        for sql, params in batch:
+            grouped.setdefault(sql, []).append(params)
+        for attempt in range(5):
+            try:
+                with self.pool.connection() as conn:
+                    for sql, rows in grouped.items():
+                        conn.executemany(sql, rows)
+                return
+            except sqlite3.OperationalError as e:
+                self.last_error = repr(e)
+                if "locked" not in str(e) and "busy" not in str(e):
+                    raise
+                time.sleep(0.1 * (attempt + 1))
+            except Exception as e:
+                self.last_error = repr(e)
+                raise
+        raise _Locked(self.last_error)
+
+
+# =====================================================
+# PROCESS-WIDE ACCESS
+# =====================================================
+_pool = None
+_writer = None
+_init_lock = threading.Lock()
+
+
+def pool():
+    global _pool, _writer
+    with _init_lock:
+        if _pool is None:
+            _pool = Pool(config.DB_PATH)
+            _writer = BatchWriter(_pool)
+            atexit.register(_writer.flush)
+    return _pool
+
+
+def writer():
+    pool()
+    return _writer
+
+
+def connection():
+    return pool().connection()
+
+
+# =====================================================
+# QUERIES
+# =====================================================
+def find_user(email):
+    """(id, name, email, password hash, role) or None; credentials are checked by auth.py."""
+    with connection() as conn:
+        return conn.execute(SQL_FIND_USER, (email,)).fetchone()
+
+
+def create_user(name, email, password_hash, role="user"):
+    """Raises sqlite3.IntegrityError if the email is taken."""
+    with connection() as conn:
+        conn.execute(SQL_INSERT_USER, (name, email, password_hash, role))
+
+
+def update_password(email, new_hash, old_hash):
+    """Replace the stored hash only if it is still `old_hash`; returns whether it was replaced."""
+    with connection() as conn:
+        return conn.execute(SQL_UPDATE_PASSWORD, (new_hash, email, old_hash)).rowcount == 1
+
+
+def set_role(email, role):
+    with connection() as conn:
+        return conn.execute(SQL_SET_ROLE, (role, email)).rowcount == 1
+
+
+def user_passwords():
+    """[(email, stored password)] for every user, for migrations."""
+    with connection() as conn:
+        return conn.execute(SQL_USER_PASSWORDS).fetchall()
+
+
+def record_login(email, when=None):
+    writer().put(SQL_INSERT_LOGIN, (email, str(when or datetime.now())))
+
+
+def count_users():
+    with connection() as conn:
+        return conn.execute(SQL_COUNT_USERS).fetchone()[0]
+
+
+def daily_logins():
+    """[(day, logins, distinct users)] from the rollup table."""
+    with connection() as conn:
+        return conn.execute(SQL_DAILY_LOGINS).fetchall()
+
+
+def hourly_logins(since):
+    """[(hour, logins)] for hours at or after `since` ("YYYY-MM-DD HH")."""
+    with connection() as conn:
+        return conn.execute(SQL_HOURLY_LOGINS, (since,)).fetchall()
+
+
+def total_logins():
+    with connection() as conn:
+        return conn.execute(SQL_TOTAL_LOGINS).fetchone()[0]
+
+
+# =====================================================
+# RECOGNITION EVENTS
+# =====================================================
+def record_event(email, kind, value, conf=None, frames=None, when=None):
+    """Queue one committed letter/word/sentence on the batch writer; never blocks the caller."""
+    writer().put(SQL_INSERT_EVENT, (str(when or datetime.now()), email, kind, value, conf, frames))
+
+
+def _per_letter(total, letters):
+    return total / letters if letters else None
+
+
+def recognition_by_user(since=""):
+    """[(email, letters, mean conf, mean frames per letter, words, sentences)] from the daily rollup.
+
+    `since` is an inclusive "YYYY-MM-DD"; the default covers all history,
+    including events already compacted out of the raw table.
+    """
+    with connection() as conn:
+        rows = conn.execute(SQL_RECOGNITION_BY_USER, (str(since),)).fetchall()
+    return [(email, letters, _per_letter(conf, letters), _per_letter(frames, letters), words, sentences)
+            for email, letters, conf, frames, words, sentences in rows]
+
+
+def recognition_daily(since=""):
+    """[(day, letters, words, sentences)] from the daily rollup."""
+    with connection() as conn:
+        return conn.execute(SQL_RECOGNITION_DAILY, (str(since),)).fetchall()
+
+
+def events_before(cutoff, after=0, limit=50000):
+    """Raw event rows with ts before `cutoff`, in id order after id `after`."""
+    with connection() as conn:
+        return conn.execute(SQL_EVENTS_BEFORE, (after, str(cutoff), limit)).fetchall()
+
+
+def delete_events(after, through, cutoff):
+    with connection() as conn:
+        return conn.execute(SQL_DELETE_EVENTS, (after, through, str(cutoff))).rowcount
+
+
+# =====================================================
+# KEYSET PAGINATION
+# =====================================================
+# Pages are addressed by the last row seen instead of OFFSET, so every page
+# is an index range scan no matter how deep into the table it is.
+
+def _prefix_range(prefix):
+    """(low, high) bounds matching strings that start with `prefix`, index-friendly unlike LIKE."""
+    return prefix, prefix + "\U0010ffff"
+
+
+def users_page(after=None, limit=50, email_prefix=None, descending=False):
+    """[(name, email, role)] ordered by email, starting after the `after` email."""
+    clauses, params = [], []
+    if email_prefix:
+        clauses.append("email >= ? AND email < ?")
+        params += _prefix_range(email_prefix)
+    if after is not None:
+        clauses.append("email < ?" if descending else "email > ?")
+        params.append(after)
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    order = "DESC" if descending else "ASC"
+    with connection() as conn:
+        return conn.execute(
+            f"SELECT name, email, role FROM users {where} ORDER BY email {order} LIMIT ?",
+            (*params, limit),
+        ).fetchall()
+
+
+def _logins_query(after, limit, email, start, end, newest_first):
+    clauses, params = [], []
+    if email:
+        clauses.append("email = ?")
+        params.append(email)
+    if start:
+        clauses.append("login_time >= ?")
+        params.append(str(start))
+    if end:
+        clauses.append("login_time < ?")
+        params.append(str(end))
+    if after is not None:
+        clauses.append("(login_time, id) < (?, ?)" if newest_first else "(login_time, id) > (?, ?)")
+        params += after
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    order = "DESC" if newest_first else "ASC"
+    sql = (f"SELECT id, email, login_time FROM logins {where} "
+           f"ORDER BY login_time {order}, id {order} LIMIT ?")
+    return sql, (*params, limit)
+
+
+def logins_page(after=None, limit=50, email=None, start=None, end=None, newest_first=True):
+    """(rows, cursor): [(email, login_time)] and the cursor for the next page (None at the end).
+
+    `start`/`end` bound login_time (end exclusive) and accept dates or
+    "YYYY-MM-DD[ HH:MM:SS]" strings.
+    """
+    with connection() as conn:
+        rows = conn.execute(*_logins_query(after, limit, email, start, end, newest_first)).fetchall()
+    cursor = (rows[-1][2], rows[-1][0]) if len(rows) == limit else None
+    return [(e, t) for _, e, t in rows], cursor
+
+
+def iter_logins_csv(email=None, start=None, end=None, chunk=5000):
+    """Yield CSV text a chunk of rows at a time; memory stays bounded by `chunk`."""
+    buf = io.StringIO()
+    out = csv.writer(buf)
+    out.writerow(["email", "login_time"])
+    after = None
+    while True:
+        rows, after = logins_page(after, chunk, email, start, end, newest_first=False)
+        out.writerows(rows)
+        yield buf.getvalue()
+        buf.seek(0)
+        buf.truncate()
+        if after is None:
+            return
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Database maintenance")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    sub.add_parser("backfill", help="rebuild login rollups from the logins table")
+    export = sub.add_parser("export-logins", help="stream login history to a CSV file")
+    export.add_argument("out")
+    export.add_argument("--email")
+    export.add_argument("--start", help="YYYY-MM-DD, inclusive")
+    export.add_argument("--end", help="YYYY-MM-DD, exclusive")
+    args = parser.parse_args()
+
+    if args.cmd == "export-logins":
+        with open(args.out, "w", newline="") as f:
+            for chunk in iter_logins_csv(args.email, args.start, args.end):
+                f.write(chunk)
+        print(f"wrote {args.out}")
+
+    if args.cmd == "backfill":
+        with connection() as conn:
+            backfill_rollups(conn)
+            days = conn.execute("SELECT COUNT(*), COALESCE(SUM(logins), 0) FROM login_daily").fetchone()
+        print(f"rollups rebuilt: {days[0]} days, {days[1]} logins")
+
+
+if __name__ == "__main__":
+    main()
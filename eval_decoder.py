@@ -0,0 +1,191 @@
+import argparse
+import json
+import string
+
+import numpy as np
+
+import config
+from recognition import LetterAssembler, WindowAssembler
+
+# =====================================================
+# RECORDED PROBABILITY SEQUENCES
+# =====================================================
+# A sequence is an .npz with
+#   probs (T, C) float32  per-frame class probabilities, NaN rows = no hand
+#   t     (T,)   float64  frame timestamps in seconds
+#   names (C,)            class names, in model.names order
+#   truth ()              expected sentence, e.g. "hello world" (optional)
+# Decoders are then compared offline on exactly the same model outputs.
+
+
+def record(source, out, truth="", mode=None, fps=30.0, flip=True):
+    """Run hands + recognizer over a video or frame folder and save its probability sequence."""
+    import cv2
+
+    import registry
+    from recognition import class_names
+    from replay import iter_frames
+
+    recognizer = registry.get_recognizer(mode)
+    names = class_names(recognizer.names)
+    probs, stamps = [], []
+    with registry.create_hands() as hands:
+        for ts, frame in iter_frames(source, fps):
+            if flip:
+                frame = cv2.flip(frame, 1)
+            result = hands.process(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+            p = None
+            if result.multi_hand_landmarks:
+                p = recognizer.probs(frame, result.multi_hand_landmarks[0])
+                if p is None:
+                    p = np.zeros(len(names), dtype=np.float32)
+            probs.append(np.full(len(names), np.nan, dtype=np.float32) if p is None else p)
+            stamps.append(ts)
+    np.savez_compressed(out, probs=np.array(probs, dtype=np.float32), t=np.array(stamps),
+                        names=np.array(names), truth=np.array(truth))
+
+
+def synthetic(words, names=string.ascii_uppercase, fps=30.0, seed=0):
+    """A noisy sequence spelling `words`: confusions, soft transitions, short hand drops between words."""
+    rng = np.random.default_rng(seed)
+    index = {n: i for i, n in enumerate(names)}
+    rows = []
+
+    def frame(letter, strength):
+        p = rng.dirichlet(np.full(len(names), 0.3)) * (1 - strength)
+        if rng.random() < 0.12:
+            # a confident wrong frame, the kind that resets a run counter
+            p[rng.integers(len(names))] += strength
+        else:
+            p[index[letter]] += strength
+        return p
+
+    for w, word in enumerate(words):
+        prev = None
+        for letter in word.upper():
+            if letter == prev:
+                # the bounce between the two halves of a double letter
+                rows += [frame(letter, 0.2) for _ in range(rng.integers(4, 7))]
+            rows += [frame(letter, rng.uniform(0.8, 0.99)) for _ in range(rng.integers(12, 20))]
+            prev = letter
+        rows += [np.full(len(names), np.nan)] * int(fps * (config.SPACE_TIME + 0.5))
+    probs = np.array(rows, dtype=np.float32)
+    return {"probs": probs, "t": np.arange(len(probs)) / fps, "names": np.array(list(names)),
+            "truth": np.array(" ".join(words))}
+
+
+# =====================================================
+# DECODING AND SCORING
+# =====================================================
+def decode(seq, assembler):
+    """Run a decoder over a sequence; returns (sentence, latency of each committed letter).
+
+    Latency is counted in frames from the first frame, since the previous
+    commit or hand drop, on which the committed letter was the top-1 class.
+    """
+    names = [str(n) for n in seq["names"]]
+    assembler.reset(now=float(seq["t"][0]) if len(seq["t"]) else 0.0)
+    if assembler.uses_probs:
+        assembler.names = names
+    latencies = []
+    first_top1 = {}
+    for i, (p, ts) in enumerate(zip(seq["probs"], seq["t"])):
+        ts = float(ts)
+        if np.isnan(p).any():
+            assembler.no_hand(ts)
+            first_top1.clear()
+            continue
+        top1 = int(p.argmax())
+        first_top1.setdefault(names[top1], i)
+        if assembler.uses_probs:
+            letter = assembler.observe_probs(p, ts)
+        else:
+            letter = assembler.observe(names[top1], float(p[top1]), ts)
+        if letter:
+            latencies.append(i - first_top1.get(letter, i) + 1)
+            first_top1.clear()
+    words = assembler.words + ([assembler.current_word] if assembler.letters else [])
+    return " ".join(words), latencies
+
+
+def edit_ops(hyp, ref):
+    """(substitutions, insertions, deletions) turning `ref` into `hyp`, character level."""
+    d = np.zeros((len(ref) + 1, len(hyp) + 1, 3), dtype=int)
+    d[1:, 0, 2] = np.arange(1, len(ref) + 1)
+    d[0, 1:, 1] = np.arange(1, len(hyp) + 1)
+    for i in range(1, len(ref) + 1):
+        for j in range(1, len(hyp) + 1):
+            options = [d[i - 1, j - 1] + (0 if ref[i - 1] == hyp[j - 1] else (1, 0, 0)),
+                       d[i, j - 1] + (0, 1, 0),
+                       d[i - 1, j] + (0, 0, 1)]
+            d[i, j] = min(options, key=lambda o: o.sum())
+    return tuple(int(v) for v in d[-1, -1])
+
+
+DECODER_FACTORIES = {
+    "stable": LetterAssembler,
+    "window": WindowAssembler,
+}
+
+
+def evaluate(sequences, decoders=config.DECODERS):
+    report = {}
+    for name in decoders:
+        subs = ins = dels = chars = 0
+        latencies = []
+        outputs = []
+        for seq in sequences:
+            sentence, lat = decode(seq, DECODER_FACTORIES[name]())
+            latencies += lat
+            outputs.append(sentence)
+            truth = str(seq["truth"]).upper()
+            if truth:
+                s, i, d = edit_ops(sentence.upper(), truth)
+                subs, ins, dels, chars = subs + s, ins + i, dels + d, chars + len(truth)
+        report[name] = {
+            "letters": len(latencies),
+            "frames_per_letter_mean": float(np.mean(latencies)) if latencies else 0.0,
+            "frames_per_letter_p90": float(np.percentile(latencies, 90)) if latencies else 0.0,
+            "spurious": ins,
+            "missed": dels,
+            "wrong": subs,
+            "char_error_rate": (subs + ins + dels) / chars if chars else None,
+            "outputs": outputs,
+        }
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare letter decoders on recorded probability sequences")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    rec = sub.add_parser("record", help="save a probability sequence from a video or frame folder")
+    rec.add_argument("source")
+    rec.add_argument("out", help=".npz path")
+    rec.add_argument("--truth", default="", help="what is signed, e.g. 'hello world'")
+    rec.add_argument("--recognizer", choices=config.RECOGNIZERS, default=config.RECOGNIZER)
+    rec.add_argument("--fps", type=float, default=30.0)
+    rec.add_argument("--no-flip", action="store_true")
+    cmp_ = sub.add_parser("compare", help="decode sequences with every decoder and score them")
+    cmp_.add_argument("sequences", nargs="*", help=".npz files written by `record`")
+    cmp_.add_argument("--synthetic", type=int, default=0, help="add N generated sequences")
+    args = parser.parse_args()
+
+    if args.cmd == "record":
+        record(args.source, args.out, args.truth, args.recognizer, args.fps, not args.no_flip)
+        return
+
+    sequences = []
+    for path in args.sequences:
+        with np.load(path) as data:
+            sequences.append({k: data[k] for k in data.files})
+    words = ["hello", "world", "good", "morning", "sorry", "thanks", "see", "you", "all"]
+    for i in range(args.synthetic):
+        rng = np.random.default_rng(i)
+        sequences.append(synthetic(list(rng.choice(words, 3)), seed=i))
+    if not sequences:
+        parser.error("no sequences: pass .npz files or --synthetic N")
+    print(json.dumps(evaluate(sequences), indent=2))
+
+
+if __name__ == "__main__":
+    main()
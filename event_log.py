@@ -0,0 +1,156 @@
+import argparse
+import os
+import time
+from datetime import date, timedelta
+
+import config
+import db
+
+# =====================================================
+# RECORDING
+# =====================================================
+class EventRecorder:
+    """Sends one user's committed letters, words and sentences to the event log.
+
+    Set it as `assembler.recorder`. Calls only enqueue on db's batch writer,
+    so they are safe from the recognition thread and never wait on SQLite.
+    """
+
+    def __init__(self, email):
+        self.email = email
+
+    def letter(self, letter, conf, frames):
+        db.record_event(self.email, "letter", letter, conf, frames)
+
+    def word(self, word):
+        db.record_event(self.email, "word", word)
+
+    def sentence(self, sentence):
+        db.record_event(self.email, "sentence", sentence)
+
+
+# =====================================================
+# COMPACTION TO PARQUET
+# =====================================================
+# Raw rows older than EVENT_KEEP_DAYS are written to
+#   <archive>/day=YYYY-MM-DD/events-<first id of that day>.parquet
+# (hive-style partitions, so pyarrow/pandas/DuckDB can prune by day) and then
+# deleted from SQLite in one transaction. The recognition_daily rollup is
+# maintained on insert and is untouched, so dashboard numbers still cover the
+# compacted history. A run interrupted before the delete finds the same rows
+# again next time, so each day gets the same file name and is replaced
+# rather than duplicated. Files are written under a "." name, which dataset
+# readers skip, and renamed into place only once complete; a crashed run's
+# leftovers are removed on the next one.
+
+COLUMNS = ("id", "ts", "email", "kind", "value", "conf", "frames")
+
+
+def _pyarrow():
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise SystemExit("event compaction needs the optional `pyarrow` package: pip install pyarrow")
+    return pa, pq
+
+
+def _schema(pa):
+    return pa.schema([("id", pa.int64()), ("ts", pa.string()), ("email", pa.string()),
+                      ("kind", pa.string()), ("value", pa.string()), ("conf", pa.float32()),
+                      ("frames", pa.int32())])
+
+
+def _table(pa, rows):
+    return pa.Table.from_pydict({name: [r[i] for r in rows] for i, name in enumerate(COLUMNS)},
+                                schema=_schema(pa))
+
+
+def _remove_partial(part):
+    for name in os.listdir(part):
+        if name.startswith(".") and name.endswith(".tmp"):
+            os.remove(os.path.join(part, name))
+
+
+def compact(out_dir=config.EVENT_ARCHIVE_DIR, keep_days=config.EVENT_KEEP_DAYS, chunk=50000):
+    """Move raw events older than `keep_days` into Parquet; returns the number of rows moved."""
+    pa, pq = _pyarrow()
+    cutoff = str(date.today() - timedelta(days=keep_days))
+    writers = {}
+    after = moved = 0
+    try:
+        # one streaming writer per day, fed a chunk at a time
+        while True:
+            rows = db.events_before(cutoff, after, chunk)
+            if not rows:
+                break
+            by_day = {}
+            for row in rows:
+                by_day.setdefault(row[1][:10], []).append(row)
+            for day, day_rows in by_day.items():
+                if day not in writers:
+                    part = os.path.join(out_dir, f"day={day}")
+                    os.makedirs(part, exist_ok=True)
+                    _remove_partial(part)
+                    name = f"events-{day_rows[0][0]}.parquet"
+                    tmp = os.path.join(part, f".{name}.tmp")
+                    writers[day] = (tmp, os.path.join(part, name),
+                                    pq.ParquetWriter(tmp, _schema(pa), compression="zstd"))
+                writers[day][2].write_table(_table(pa, day_rows))
+            after = rows[-1][0]
+            moved += len(rows)
+    finally:
+        for _, _, writer in writers.values():
+            writer.close()
+    for tmp, path, _ in writers.values():
+        os.replace(tmp, path)
+    if moved:
+        db.delete_events(0, after, cutoff)
+    return moved
+
+
+def read_archive(out_dir=config.EVENT_ARCHIVE_DIR, start=None, end=None):
+    """Archived events as a pyarrow Table, optionally limited to days in [start, end)."""
+    _pyarrow()
+    import pyarrow.dataset as ds
+
+    data = ds.dataset(out_dir, format="parquet", partitioning="hive")
+    condition = None
+    if start:
+        condition = ds.field("day") >= str(start)
+    if end:
+        upper = ds.field("day") < str(end)
+        condition = upper if condition is None else condition & upper
+    return data.to_table(filter=condition)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recognition event log maintenance")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    comp = sub.add_parser("compact", help="move old raw events into Parquet files")
+    comp.add_argument("--out", default=config.EVENT_ARCHIVE_DIR)
+    comp.add_argument("--keep-days", type=int, default=config.EVENT_KEEP_DAYS)
+    comp.add_argument("--every", type=float, default=0, help="repeat every N seconds (0: run once)")
+    summary = sub.add_parser("summary", help="per-user totals from the daily rollup")
+    summary.add_argument("--since", default="", help="YYYY-MM-DD, inclusive")
+    args = parser.parse_args()
+
+    if args.cmd == "summary":
+        for email, letters, conf, frames, words, sentences in db.recognition_by_user(args.since):
+            conf = f"{conf:.2f}" if conf is not None else "-"
+            frames = f"{frames:.1f}" if frames is not None else "-"
+            print(f"{email}: {letters} letters (conf {conf}, {frames} frames/letter), "
+                  f"{words} words, {sentences} sentences")
+        return
+
+    while True:
+        t0 = time.perf_counter()
+        moved = compact(args.out, args.keep_days)
+        print(f"compacted {moved} events in {time.perf_counter() - t0:.1f}s", flush=True)
+        if not args.every:
+            break
+        time.sleep(args.every)
+
+
+if __name__ == "__main__":
+    main()
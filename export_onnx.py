@@ -0,0 +1,149 @@
+import argparse
+import json
+import os
+import random
+import shutil
+import time
+
+import cv2
+import numpy as np
+
+import config
+from onnx_backend import OnnxClassifier, preprocess
+
+IMAGE_EXTS = (".jpg", ".jpeg", ".png", ".bmp", ".webp")
+
+
+def list_images(split_dir):
+    """[(path, class_name)] for an ultralytics classify split folder."""
+    items = []
+    for name in sorted(os.listdir(split_dir)):
+        class_dir = os.path.join(split_dir, name)
+        if not os.path.isdir(class_dir):
+            continue
+        for fname in sorted(os.listdir(class_dir)):
+            if fname.lower().endswith(IMAGE_EXTS):
+                items.append((os.path.join(class_dir, fname), name))
+    return items
+
+
+# =====================================================
+# EXPORT
+# =====================================================
+def export_onnx(model_path, out_path, imgsz):
+    from ultralytics import YOLO
+
+    exported = YOLO(model_path).export(format="onnx", imgsz=imgsz, dynamic=True, simplify=True)
+    if os.path.abspath(exported) != os.path.abspath(out_path):
+        shutil.move(exported, out_path)
+    return out_path
+
+
+def quantize_int8(fp32_path, out_path, calib_images, imgsz):
+    from onnxruntime.quantization import (
+        CalibrationDataReader, QuantFormat, QuantType, quantize_static,
+    )
+    from onnxruntime.quantization.shape_inference import quant_pre_process
+
+    class Reader(CalibrationDataReader):
+        def __init__(self, input_name):
+            self.input_name = input_name
+            self.paths = iter(calib_images)
+
+        def get_next(self):
+            for path in self.paths:
+                img = cv2.imread(path)
+                if img is not None:
+                    return {self.input_name: preprocess(img, imgsz)[None]}
+            return None
+
+    prepped = fp32_path + ".prep.onnx"
+    quant_pre_process(fp32_path, prepped)
+    input_name = OnnxClassifier(prepped).input_name
+    quantize_static(
+        prepped, out_path, Reader(input_name),
+        quant_format=QuantFormat.QDQ,
+        activation_type=QuantType.QUInt8,
+        weight_type=QuantType.QInt8,
+        per_channel=True,
+    )
+    os.remove(prepped)
+    return out_path
+
+
+# =====================================================
+# ACCURACY / LATENCY COMPARISON
+# =====================================================
+def evaluate(classify, items):
+    correct, times = 0, []
+    for path, label in items:
+        img = cv2.imread(path)
+        if img is None:
+            continue
+        t0 = time.perf_counter()
+        letter, _ = classify(img)
+        times.append(time.perf_counter() - t0)
+        correct += letter == label
+    times = np.array(times) * 1000
+    return {
+        "samples": len(times),
+        "top1": correct / max(len(times), 1),
+        "ms_mean": float(times.mean()) if len(times) else 0.0,
+        "ms_p50": float(np.percentile(times, 50)) if len(times) else 0.0,
+        "ms_p99": float(np.percentile(times, 99)) if len(times) else 0.0,
+    }
+
+
+def compare(model_path, backends, items):
+    from ultralytics import YOLO
+    from recognition import classify_roi
+
+    report = {}
+    torch_model = YOLO(model_path)
+    torch_model(items[0][0], verbose=False)
+    report["torch"] = evaluate(lambda img: classify_roi(torch_model, img), items)
+    for name, path in backends.items():
+        clf = OnnxClassifier(path, "onnx-int8" if name == "onnx-int8" else "onnx")
+        clf.classify(cv2.imread(items[0][0]))
+        report[name] = evaluate(clf.classify, items)
+        report[name]["size_mb"] = os.path.getsize(path) / 1e6
+    report["torch"]["size_mb"] = os.path.getsize(model_path) / 1e6
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export the sign classifier to ONNX / INT8 and compare backends")
+    parser.add_argument("--model", default=config.MODEL_PATH)
+    parser.add_argument("--imgsz", type=int, default=config.IMGSZ)
+    parser.add_argument("--data", default="dataset")
+    parser.add_argument("--int8", action="store_true", help="also write a statically quantized INT8 model")
+    parser.add_argument("--calib", type=int, default=200, help="training images used for INT8 calibration")
+    parser.add_argument("--compare", action="store_true", help="accuracy/latency vs PyTorch on the val split")
+    parser.add_argument("--json", help="write the comparison report here")
+    args = parser.parse_args()
+
+    backends = {"onnx": export_onnx(args.model, config.ONNX_MODEL_PATH, args.imgsz)}
+    print(f"exported {backends['onnx']}")
+
+    if args.int8:
+        calib = [p for p, _ in list_images(os.path.join(args.data, "train"))]
+        random.Random(0).shuffle(calib)
+        backends["onnx-int8"] = quantize_int8(
+            backends["onnx"], config.ONNX_INT8_MODEL_PATH, calib[:args.calib], args.imgsz
+        )
+        print(f"quantized {backends['onnx-int8']}")
+
+    if args.compare:
+        items = list_images(os.path.join(args.data, "val"))
+        report = compare(args.model, backends, items)
+        print(f"{'backend':<10} {'top1':>6} {'mean ms':>8} {'p50 ms':>7} {'p99 ms':>7} {'MB':>6}")
+        for name, r in report.items():
+            print(f"{name:<10} {r['top1']:>6.3f} {r['ms_mean']:>8.2f} {r['ms_p50']:>7.2f} "
+                  f"{r['ms_p99']:>7.2f} {r['size_mb']:>6.1f}")
+        if args.json:
+            with open(args.json, "w") as f:
+                json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
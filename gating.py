@@ -0,0 +1,51 @@
+import numpy as np
+
+from config import POSE_TOLERANCE, POSE_MAX_REUSE
+from landmark_classifier import landmark_array
+
+# =====================================================
+# MOTION GATE
+# =====================================================
+class PoseGate:
+    """Skips the recognizer while the hand pose is unchanged.
+
+    The pose counts as unchanged when no landmark moved more than
+    `tolerance` (as a fraction of the hand's bounding box) since the last
+    classified frame. The cached result (a (letter, conf) pair or a
+    probability vector, whatever the recognizer returns) is then returned,
+    so a held sign still counts toward the letter decoder. After `max_reuse` reused frames
+    the recognizer runs again regardless, so drift can't go unnoticed.
+    """
+
+    def __init__(self, tolerance=POSE_TOLERANCE, max_reuse=POSE_MAX_REUSE):
+        self.tolerance = tolerance
+        self.max_reuse = max_reuse
+        self.calls = 0
+        self.skipped = 0
+        self.reset()
+
+    def reset(self):
+        self.last_points = None
+        self.last_result = None
+        self.reused = 0
+
+    def moved(self, points):
+        if self.last_points is None:
+            return True
+        xy = points[:, :2]
+        scale = max(np.ptp(xy[:, 0]), np.ptp(xy[:, 1]), 1e-6)
+        shift = np.abs(xy - self.last_points[:, :2]).max()
+        return shift / scale > self.tolerance
+
+    def __call__(self, recognizer, frame, hand_landmarks):
+        self.calls += 1
+        points = landmark_array(hand_landmarks)
+        if not self.moved(points) and self.reused < self.max_reuse:
+            self.reused += 1
+            self.skipped += 1
+            return self.last_result
+
+        self.last_result = recognizer(frame, hand_landmarks)
+        self.last_points = points
+        self.reused = 0
+        return self.last_result
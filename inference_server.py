@@ -0,0 +1,258 @@
+import argparse
+import json
+import queue
+import socket
+import socketserver
+import struct
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import Future
+
+import numpy as np
+
+import config
+
+# =====================================================
+# WIRE PROTOCOL
+# =====================================================
+# request:  op (1 byte) | payload length (uint32) | h (uint16) | w (uint16) | payload
+# response: payload length (uint32) | JSON payload
+# ops: C = classify a raw BGR uint8 crop, N = class names, S = server stats
+HEADER = struct.Struct(">cIHH")
+REPLY = struct.Struct(">I")
+
+
+def parse_address(addr):
+    """"host:port" -> (AF_INET, (host, port)); "unix:/path" -> (AF_UNIX, path)."""
+    if addr.startswith("unix:"):
+        return socket.AF_UNIX, addr[len("unix:"):]
+    host, port = addr.rsplit(":", 1)
+    return socket.AF_INET, (host, int(port))
+
+
+def _recv_exact(sock, n):
+    buf = bytearray(n)
+    view = memoryview(buf)
+    while n:
+        got = sock.recv_into(view, n)
+        if not got:
+            raise ConnectionError("connection closed")
+        view = view[got:]
+        n -= got
+    return bytes(buf)
+
+
+# =====================================================
+# MICRO-BATCHER
+# =====================================================
+class MicroBatcher:
+    """Groups concurrent classify requests into batches.
+
+    A batch is run as soon as `max_batch` crops are waiting, or `max_wait`
+    seconds after its first crop arrived, whichever comes first.
+    """
+
+    def __init__(self, model, max_batch=16, max_wait=0.005, window=2000):
+        self.model = model
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.requests = queue.Queue()
+        self.batch_sizes = Counter()
+        self.latencies = deque(maxlen=window)
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def submit(self, roi):
+        future = Future()
+        self.requests.put((time.perf_counter(), roi, future))
+        return future
+
+    def _run(self):
+        while True:
+            batch = [self.requests.get()]
+            deadline = time.perf_counter() + self.max_wait
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self.requests.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            try:
+                probs = self.model.predict_batch([roi for _, roi, _ in batch])
+            except Exception:
+                # one bad crop must not fail the other sessions' requests;
+                # rerun them one by one so only its own future gets the error
+                for item in batch:
+                    self._run_one(item)
+                continue
+
+            done = time.perf_counter()
+            self.batch_sizes[len(batch)] += 1
+            for (started, _, future), p in zip(batch, probs):
+                self._resolve(future, started, done, p)
+
+    def _run_one(self, item):
+        started, roi, future = item
+        try:
+            p = self.model.predict_batch([roi])[0]
+        except Exception as e:
+            future.set_exception(e)
+            return
+        self.batch_sizes[1] += 1
+        self._resolve(future, started, time.perf_counter(), p)
+
+    def _resolve(self, future, started, done, p):
+        top1 = int(np.argmax(p))
+        self.latencies.append(done - started)
+        future.set_result((self.model.names[top1], float(p[top1])))
+
+    def stats(self):
+        lat = np.array(self.latencies) * 1000
+        return {
+            "batches": sum(self.batch_sizes.values()),
+            "batch_size_hist": {str(k): v for k, v in sorted(self.batch_sizes.items())},
+            "latency_ms_p50": float(np.percentile(lat, 50)) if len(lat) else 0.0,
+            "latency_ms_p99": float(np.percentile(lat, 99)) if len(lat) else 0.0,
+            "queued": self.requests.qsize(),
+        }
+
+
+# =====================================================
+# SERVER
+# =====================================================
+class _Handler(socketserver.BaseRequestHandler):
+    def handle(self):
+        batcher = self.server.batcher
+        sock = self.request
+        while True:
+            try:
+                op, length, h, w = HEADER.unpack(_recv_exact(sock, HEADER.size))
+                payload = _recv_exact(sock, length) if length else b""
+            except ConnectionError:
+                return
+
+            if op == b"C" and (h < config.MIN_ROI_SIZE or w < config.MIN_ROI_SIZE):
+                reply = {"error": f"crop is {h}x{w}, smaller than {config.MIN_ROI_SIZE}x{config.MIN_ROI_SIZE}"}
+            elif op == b"C" and len(payload) != h * w * 3:
+                reply = {"error": f"payload is {len(payload)} bytes, expected {h}x{w}x3 = {h * w * 3}"}
+            elif op == b"C":
+                roi = np.frombuffer(payload, dtype=np.uint8).reshape(h, w, 3)
+                try:
+                    letter, conf = batcher.submit(roi).result()
+                    reply = {"letter": letter, "conf": conf}
+                except Exception as e:
+                    reply = {"error": str(e)}
+            elif op == b"N":
+                reply = {"names": {str(k): v for k, v in dict(batcher.model.names).items()}}
+            elif op == b"S":
+                reply = batcher.stats()
+            else:
+                reply = {"error": f"unknown op {op!r}"}
+
+            data = json.dumps(reply).encode()
+            sock.sendall(REPLY.pack(len(data)) + data)
+
+
+class _TCPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class _UnixServer(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+
+def make_server(addr, batcher):
+    family, address = parse_address(addr)
+    server_cls = _UnixServer if family == socket.AF_UNIX else _TCPServer
+    server = server_cls(address, _Handler)
+    server.batcher = batcher
+    return server
+
+
+# =====================================================
+# CLIENT
+# =====================================================
+class RemoteClassifier:
+    """Thin client for the inference server, usable as a registry backend.
+
+    Each calling thread keeps its own connection, so concurrent sessions
+    reach the server in parallel and get batched together there.
+    """
+
+    def __init__(self, addr=config.INFERENCE_ADDR, timeout=5.0):
+        self.addr = addr
+        self.timeout = timeout
+        self.local = threading.local()
+        self.names = {int(k): v for k, v in self._call(b"N")["names"].items()}
+
+    def _sock(self):
+        sock = getattr(self.local, "sock", None)
+        if sock is None:
+            family, address = parse_address(self.addr)
+            sock = socket.socket(family, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            sock.connect(address)
+            if family == socket.AF_INET:
+                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            self.local.sock = sock
+        return sock
+
+    def _call(self, op, payload=b"", h=0, w=0):
+        sock = self._sock()
+        try:
+            sock.sendall(HEADER.pack(op, len(payload), h, w) + payload)
+            (length,) = REPLY.unpack(_recv_exact(sock, REPLY.size))
+            reply = json.loads(_recv_exact(sock, length))
+        except (OSError, ConnectionError):
+            sock.close()
+            self.local.sock = None
+            raise
+        if "error" in reply:
+            raise RuntimeError(reply["error"])
+        return reply
+
+    def classify(self, roi):
+        roi = np.ascontiguousarray(roi, dtype=np.uint8)
+        h, w = roi.shape[:2]
+        reply = self._call(b"C", roi.tobytes(), h, w)
+        return reply["letter"], reply["conf"]
+
+    def stats(self):
+        return self._call(b"S")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Shared micro-batching sign classifier server")
+    parser.add_argument("--addr", default=config.INFERENCE_ADDR, help='"host:port" or "unix:/path"')
+    parser.add_argument("--backend", default="torch", choices=[b for b in config.BACKENDS if b != "remote"])
+    parser.add_argument("--max-batch", type=int, default=16)
+    parser.add_argument("--max-wait-ms", type=float, default=5.0)
+    parser.add_argument("--stats-every", type=float, default=30.0, help="seconds between stats lines, 0 to disable")
+    args = parser.parse_args()
+
+    config.BACKEND = args.backend
+    import registry
+
+    model = registry.get_model()
+    print(f"loaded {args.backend} model: {registry.load_stats()}")
+    batcher = MicroBatcher(model, args.max_batch, args.max_wait_ms / 1000)
+    server = make_server(args.addr, batcher)
+
+    if args.stats_every:
+        def report():
+            while True:
+                time.sleep(args.stats_every)
+                print(json.dumps(batcher.stats()), flush=True)
+        threading.Thread(target=report, daemon=True).start()
+
+    print(f"serving on {args.addr}", flush=True)
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
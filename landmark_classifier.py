@@ -0,0 +1,129 @@
+import numpy as np
+
+# =====================================================
+# LANDMARK FEATURES
+# =====================================================
+def landmark_array(hand_landmarks):
+    """MediaPipe hand landmarks (or an existing (21, 3) array) as float32 (21, 3)."""
+    if isinstance(hand_landmarks, np.ndarray):
+        return hand_landmarks.astype(np.float32).reshape(21, 3)
+    return np.array([(p.x, p.y, p.z) for p in hand_landmarks.landmark], dtype=np.float32)
+
+
+def normalize_landmarks(points):
+    """Wrist-relative, scale-free feature vector of length 63."""
+    pts = points - points[0]
+    scale = np.abs(pts[:, :2]).max()
+    if scale > 0:
+        pts = pts / scale
+    return pts.reshape(-1)
+
+
+def landmark_features(hand_landmarks):
+    return normalize_landmarks(landmark_array(hand_landmarks))
+
+
+def _softmax(z):
+    z = z - z.max(axis=-1, keepdims=True)
+    e = np.exp(z)
+    return e / e.sum(axis=-1, keepdims=True)
+
+
+# =====================================================
+# CLASSIFIER
+# =====================================================
+class LandmarkClassifier:
+    """Letter classifier over normalized landmark vectors.
+
+    kind="mlp" is a one-hidden-layer network, kind="centroid" a nearest
+    centroid model with softmax over negative distances. Either way a frame
+    costs a couple of small matrix multiplies instead of an image model.
+    """
+
+    def __init__(self, params):
+        self.kind = str(params["kind"])
+        self.params = params
+        self.names = {i: str(n) for i, n in enumerate(params["names"])}
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            return cls({k: data[k] for k in data.files})
+
+    def save(self, path):
+        np.savez(path, **self.params)
+
+    def predict_proba(self, features):
+        """Class probabilities for one (63,) vector or a batch (n, 63)."""
+        p = self.params
+        x = (np.atleast_2d(features) - p["mean"]) / p["std"]
+        if self.kind == "centroid":
+            d = ((x[:, None, :] - p["centroids"][None]) ** 2).sum(-1)
+            return _softmax(-d / p["temperature"])
+        h = np.maximum(x @ p["W1"] + p["b1"], 0)
+        return _softmax(h @ p["W2"] + p["b2"])
+
+    def probs(self, frame, hand_landmarks):
+        return self.predict_proba(landmark_features(hand_landmarks))[0]
+
+    def __call__(self, frame, hand_landmarks):
+        probs = self.probs(frame, hand_landmarks)
+        top1 = int(probs.argmax())
+        return self.names[top1], float(probs[top1])
+
+
+# =====================================================
+# TRAINING
+# =====================================================
+def fit_centroid(X, y, names, temperature=1.0):
+    counts = np.bincount(y, minlength=len(names))
+    empty = [name for name, n in zip(names, counts) if n == 0]
+    if empty:
+        # a class without samples has no centroid (its mean would be NaN)
+        raise ValueError(f"no training samples for classes {empty}; add images or remove their folders")
+    mean, std = X.mean(0), X.std(0) + 1e-6
+    Xn = (X - mean) / std
+    centroids = np.stack([Xn[y == c].mean(0) for c in range(len(names))])
+    return LandmarkClassifier({
+        "kind": np.array("centroid"), "names": np.array(names),
+        "mean": mean, "std": std, "centroids": centroids,
+        "temperature": np.float32(temperature),
+    })
+
+
+def fit_mlp(X, y, names, hidden=64, epochs=500, lr=0.01, weight_decay=1e-4, seed=0):
+    rng = np.random.default_rng(seed)
+    mean, std = X.mean(0), X.std(0) + 1e-6
+    Xn = ((X - mean) / std).astype(np.float32)
+    n, d = Xn.shape
+    k = len(names)
+    onehot = np.eye(k, dtype=np.float32)[y]
+
+    params = {
+        "W1": rng.normal(0, np.sqrt(2 / d), (d, hidden)).astype(np.float32),
+        "b1": np.zeros(hidden, np.float32),
+        "W2": rng.normal(0, np.sqrt(2 / hidden), (hidden, k)).astype(np.float32),
+        "b2": np.zeros(k, np.float32),
+    }
+    # full-batch Adam
+    m = {key: np.zeros_like(v) for key, v in params.items()}
+    v = {key: np.zeros_like(val) for key, val in params.items()}
+    for t in range(1, epochs + 1):
+        z1 = Xn @ params["W1"] + params["b1"]
+        h = np.maximum(z1, 0)
+        p = _softmax(h @ params["W2"] + params["b2"])
+        g2 = (p - onehot) / n
+        g1 = (g2 @ params["W2"].T) * (z1 > 0)
+        grads = {
+            "W2": h.T @ g2 + weight_decay * params["W2"], "b2": g2.sum(0),
+            "W1": Xn.T @ g1 + weight_decay * params["W1"], "b1": g1.sum(0),
+        }
+        for key, g in grads.items():
+            m[key] = 0.9 * m[key] + 0.1 * g
+            v[key] = 0.999 * v[key] + 0.001 * g * g
+            mhat = m[key] / (1 - 0.9 ** t)
+            vhat = v[key] / (1 - 0.999 ** t)
+            params[key] -= lr * mhat / (np.sqrt(vhat) + 1e-8)
+
+    params.update({"kind": np.array("mlp"), "names": np.array(names), "mean": mean, "std": std})
+    return LandmarkClassifier(params)
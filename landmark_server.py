@@ -0,0 +1,258 @@
+import argparse
+import asyncio
+import json
+import struct
+import time
+
+import numpy as np
+
+import config
+
+# =====================================================
+# WIRE PROTOCOL
+# =====================================================
+# One WebSocket connection is one signer: it gets its own letter decoder,
+# motion gate and (for image input) MediaPipe graph, exactly like one
+# sign_to_speech() session.
+#
+# client -> server, binary:
+#   "L" | ts (float64) | 21 x (x, y, z) float32   hand landmarks (261 bytes)
+#   "L" | ts (float64)                            no hand in this frame
+#   "J" | ts (float64) | JPEG/WebP bytes          a frame; the server runs MediaPipe
+# client -> server, text (JSON):
+#   {"op": "hello", "recognizer": "landmarks", "ack_every": 0}
+#   {"op": "accept", "index": 0} | {"op": "reset"} | {"op": "finish"}
+# server -> client, text (JSON):
+#   {"type": "letter" | "word" | "sentence", ...}   as from StreamRecognizer
+#   {"type": "state", "word", "sentence", "suggestions"} after every change
+#   {"type": "ack", "ts"}                           every ack_every frames
+#   {"type": "error", "error"}
+FRAME = struct.Struct("<cd")
+POINTS = 21 * 3
+
+
+def encode_landmarks(ts, points=None):
+    head = FRAME.pack(b"L", ts)
+    if points is None:
+        return head
+    return head + np.asarray(points, dtype="<f4").reshape(POINTS).tobytes()
+
+
+def encode_image(ts, data):
+    return FRAME.pack(b"J", ts) + data
+
+
+# =====================================================
+# SERVER SESSION
+# =====================================================
+class Session:
+    """Letter/word state for one connected client."""
+
+    def __init__(self, recognizer_mode=None, lexicon=None):
+        import registry
+        from gating import PoseGate
+        from recognition import StreamRecognizer
+
+        # clients that skip "hello" are assumed to send landmarks
+        self.mode = recognizer_mode or "landmarks"
+        self.stream = StreamRecognizer(None, registry.get_recognizer(self.mode), None, PoseGate(), flip=False)
+        self.stream.assembler.lexicon = lexicon
+        self.stream.assembler.reset(now=0.0)
+        self.ack_every = 0
+        self.frames = 0
+
+    @property
+    def assembler(self):
+        return self.stream.assembler
+
+    def landmarks(self, ts, payload):
+        if self.mode != "landmarks" and payload:
+            raise ValueError("landmark input needs the landmarks recognizer; send frames for image models")
+        points = np.frombuffer(payload, dtype="<f4").reshape(21, 3) if payload else None
+        return self.stream.process_landmarks(points, None, ts)
+
+    def image(self, ts, payload):
+        import cv2
+
+        import registry
+
+        if self.stream.hands is None:
+            # tracking mode needs one graph per stream; created on first frame
+            self.stream.hands = registry.create_hands()
+        frame = cv2.imdecode(np.frombuffer(payload, dtype=np.uint8), cv2.IMREAD_COLOR)
+        if frame is None:
+            raise ValueError("undecodable frame")
+        return self.stream.process(frame, ts)
+
+    def state(self):
+        a = self.assembler
+        return {"type": "state", "word": a.current_word, "sentence": a.sentence,
+                "suggestions": list(a.suggestions)}
+
+    def close(self):
+        if self.stream.hands is not None:
+            self.stream.hands.close()
+
+
+async def handle(ws, lexicon=None):
+    loop = asyncio.get_running_loop()
+    session = None
+    try:
+        async for message in ws:
+            try:
+                if isinstance(message, str):
+                    request = json.loads(message)
+                    if not isinstance(request, dict):
+                        raise ValueError("control messages must be JSON objects")
+                    op = request.get("op")
+                    if op == "hello" or session is None:
+                        if session is not None:
+                            session.close()
+                        mode = request.get("recognizer")
+                        session = await loop.run_in_executor(None, Session, mode, lexicon)
+                        session.ack_every = int(request.get("ack_every", 0))
+                        if op == "hello":
+                            await ws.send(json.dumps(session.state()))
+                            continue
+                    events = []
+                    if op == "accept":
+                        word = session.assembler.accept(int(request.get("index", 0)))
+                        events = [{"t": round(session.stream.last_ts, 3), "type": "word", "word": word}] if word else []
+                    elif op == "reset":
+                        session.assembler.reset(now=session.stream.last_ts)
+                    elif op == "finish":
+                        events = session.stream.finish()
+                    else:
+                        raise ValueError(f"unknown op {op!r}")
+                    for event in events:
+                        await ws.send(json.dumps(event))
+                    await ws.send(json.dumps(session.state()))
+                    continue
+
+                if session is None:
+                    session = await loop.run_in_executor(None, Session, None, lexicon)
+                kind, ts = FRAME.unpack_from(message)
+                payload = message[FRAME.size:]
+                before = (session.assembler.current_word, session.assembler.sentence)
+                if kind == b"L":
+                    # a few microseconds with the landmark model; stays on the loop
+                    events = session.landmarks(ts, payload)
+                elif kind == b"J":
+                    events = await loop.run_in_executor(None, session.image, ts, payload)
+                else:
+                    raise ValueError(f"unknown frame kind {kind!r}")
+                for event in events:
+                    await ws.send(json.dumps(event))
+                if events or before != (session.assembler.current_word, session.assembler.sentence):
+                    await ws.send(json.dumps(session.state()))
+                session.frames += 1
+                if session.ack_every and session.frames % session.ack_every == 0:
+                    await ws.send(json.dumps({"type": "ack", "ts": ts}))
+            except (ValueError, TypeError, KeyError, struct.error) as e:
+                await ws.send(json.dumps({"type": "error", "error": str(e)}))
+    finally:
+        if session is not None:
+            session.close()
+
+
+async def serve(addr=config.LANDMARK_API_ADDR, suggestions=True):
+    try:
+        import websockets
+    except ImportError:
+        raise SystemExit("the landmark API needs the optional `websockets` package: pip install websockets")
+    import registry
+
+    lexicon = registry.get_lexicon() if suggestions else None
+    host, port = addr.rsplit(":", 1)
+    async with websockets.serve(lambda ws, *_: handle(ws, lexicon), host, int(port),
+                                max_size=2 ** 22, compression=None):
+        print(f"landmark API on ws://{addr}", flush=True)
+        await asyncio.Future()
+
+
+# =====================================================
+# LOAD GENERATOR
+# =====================================================
+def synthetic_hand(rng):
+    """A plausible-looking (21, 3) hand; only the wire size and decoder path matter here."""
+    base = rng.uniform(0.3, 0.7, size=(1, 3)).astype(np.float32)
+    return base + rng.normal(0, 0.05, size=(21, 3)).astype(np.float32)
+
+
+async def _client(uri, fps, duration, seed, stats):
+    import websockets
+
+    rng = np.random.default_rng(seed)
+    pose = synthetic_hand(rng)
+    async with websockets.connect(uri, max_size=2 ** 22, compression=None) as ws:
+        await ws.send(json.dumps({"op": "hello", "recognizer": "landmarks", "ack_every": 10}))
+        await ws.recv()
+
+        async def receive():
+            async for message in ws:
+                reply = json.loads(message)
+                if reply["type"] == "ack":
+                    stats["rtt"].append(time.perf_counter() - reply["ts"])
+                elif reply["type"] == "error":
+                    stats["errors"] += 1
+                else:
+                    stats["events"] += 1
+
+        receiver = asyncio.ensure_future(receive())
+        start = time.perf_counter()
+        i = 0
+        while time.perf_counter() - start < duration:
+            if i % 90 == 0:
+                pose = synthetic_hand(rng)
+            hand = i % 90 < 75  # a hand drop every three seconds at 30 fps
+            points = pose + rng.normal(0, 0.002, size=pose.shape).astype(np.float32) if hand else None
+            frame = encode_landmarks(time.perf_counter(), points)
+            await ws.send(frame)
+            stats["frames"] += 1
+            stats["bytes"] += len(frame)
+            i += 1
+            await asyncio.sleep(max(0.0, start + i / fps - time.perf_counter()))
+        await ws.send(json.dumps({"op": "finish"}))
+        await asyncio.sleep(0.2)
+        receiver.cancel()
+
+
+async def loadgen(uri, clients=50, fps=30.0, duration=10.0):
+    stats = {"frames": 0, "bytes": 0, "events": 0, "errors": 0, "rtt": []}
+    t0 = time.perf_counter()
+    await asyncio.gather(*(_client(uri, fps, duration, i, stats) for i in range(clients)))
+    elapsed = time.perf_counter() - t0
+    rtt = np.array(stats["rtt"]) * 1000
+    return {
+        "clients": clients,
+        "frames_per_s": stats["frames"] / elapsed,
+        "bytes_per_frame": stats["bytes"] / max(stats["frames"], 1),
+        "events": stats["events"],
+        "errors": stats["errors"],
+        "rtt_ms_p50": float(np.percentile(rtt, 50)) if len(rtt) else None,
+        "rtt_ms_p99": float(np.percentile(rtt, 99)) if len(rtt) else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="WebSocket API: stream landmarks or frames, get letters and words back")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    srv = sub.add_parser("serve")
+    srv.add_argument("--addr", default=config.LANDMARK_API_ADDR, help='"host:port"')
+    srv.add_argument("--no-suggestions", action="store_true", help="don't load the lexicon")
+    gen = sub.add_parser("loadgen", help="simulate many landmark-streaming clients")
+    gen.add_argument("--addr", default=config.LANDMARK_API_ADDR)
+    gen.add_argument("--clients", type=int, default=50)
+    gen.add_argument("--fps", type=float, default=30.0)
+    gen.add_argument("--duration", type=float, default=10.0)
+    args = parser.parse_args()
+
+    if args.cmd == "serve":
+        asyncio.run(serve(args.addr, not args.no_suggestions))
+    else:
+        report = asyncio.run(loadgen(f"ws://{args.addr}", args.clients, args.fps, args.duration))
+        print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
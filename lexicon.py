@@ -0,0 +1,229 @@
+import argparse
+import heapq
+import math
+import os
+import time
+
+import numpy as np
+
+import config
+
+# =====================================================
+# COMPILED LEXICON TRIE
+# =====================================================
+# The word list is compiled once into flat NumPy arrays (one .npy per array)
+# and memory-mapped, so every process and session shares the same pages and
+# nothing is rebuilt per rerun. Nodes are numbered breadth first, so node n's
+# children are the contiguous ids child_start[n]..child_start[n + 1] and the
+# edge into node i is labelled edge_char[i]. Each node also stores the ids of
+# the TOP_K most frequent words below it; word ids are in frequency order, so
+# a completion is one prefix walk plus a row read.
+
+TOP_K = 8
+ARRAYS = ("child_start", "edge_char", "node_word", "top", "word_offsets", "word_bytes", "word_score")
+
+
+def read_wordlist(path):
+    """[(word, score)] from "word" lines (ranked, most frequent first) or "word count" lines."""
+    scores = {}
+    with open(path, encoding="utf-8") as f:
+        for rank, line in enumerate(f, 1):
+            parts = line.split()
+            if not parts:
+                continue
+            word = parts[0].lower()
+            if not (word.isascii() and word.isalpha()) or word in scores:
+                continue
+            scores[word] = float(parts[1]) if len(parts) > 1 else 1e6 / rank
+    return sorted(scores.items(), key=lambda item: -item[1])
+
+
+def build(words, out_dir, top_k=TOP_K):
+    """Compile [(word, score)] (most frequent first) into the array files in `out_dir`."""
+    # nested dict trie first; "" marks the end of a word
+    root = {}
+    for wid, (word, _) in enumerate(words):
+        node = root
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[""] = wid
+
+    nodes = [root]
+    chars = [0]
+    child_start = [1]
+    for node in nodes:
+        for ch in sorted(k for k in node if k):
+            nodes.append(node[ch])
+            chars.append(ord(ch))
+        child_start.append(len(nodes))
+    n = len(nodes)
+    node_word = np.array([node.get("", -1) for node in nodes], dtype=np.int32)
+
+    # top-k word ids per subtree, children before parents
+    top = np.full((n, top_k), -1, dtype=np.int32)
+    for i in range(n - 1, -1, -1):
+        lists = [top[c][top[c] >= 0] for c in range(child_start[i], child_start[i + 1])]
+        if node_word[i] >= 0:
+            lists.append(node_word[i:i + 1])
+        best = heapq.nsmallest(top_k, (int(w) for ids in lists for w in ids))
+        top[i, :len(best)] = best
+
+    encoded = [w.encode() for w, _ in words]
+    arrays = {
+        "child_start": np.array(child_start, dtype=np.int32),
+        "edge_char": np.array(chars, dtype=np.uint8),
+        "node_word": node_word,
+        "top": top,
+        "word_offsets": np.cumsum([0] + [len(w) for w in encoded], dtype=np.int64),
+        "word_bytes": np.frombuffer(b"".join(encoded), dtype=np.uint8),
+        "word_score": np.array([s for _, s in words], dtype=np.float32),
+    }
+    os.makedirs(out_dir, exist_ok=True)
+    for name, arr in arrays.items():
+        tmp = os.path.join(out_dir, name + ".tmp.npy")
+        np.save(tmp, arr)
+        os.replace(tmp, os.path.join(out_dir, name + ".npy"))
+
+
+def compile_if_stale(wordlist=config.LEXICON_WORDS, out_dir=config.LEXICON_DIR):
+    marker = os.path.join(out_dir, "word_score.npy")
+    if not os.path.exists(marker) or os.path.getmtime(marker) < os.path.getmtime(wordlist):
+        build(read_wordlist(wordlist), out_dir)
+    return out_dir
+
+
+class Lexicon:
+    """Read-only, memory-mapped word trie with ranked completion and spelling correction."""
+
+    def __init__(self, directory):
+        a = {name: np.load(os.path.join(directory, name + ".npy"), mmap_mode="r") for name in ARRAYS}
+        self.child_start = a["child_start"]
+        self.edge_char = a["edge_char"]
+        self.node_word = a["node_word"]
+        self.top = a["top"]
+        self.word_offsets = a["word_offsets"]
+        self.word_bytes = a["word_bytes"]
+        self.log_score = np.log(np.maximum(np.asarray(a["word_score"], dtype=np.float64), 1e-9))
+
+    @classmethod
+    def load(cls, wordlist=config.LEXICON_WORDS, directory=config.LEXICON_DIR):
+        return cls(compile_if_stale(wordlist, directory))
+
+    def __len__(self):
+        return len(self.word_offsets) - 1
+
+    def word(self, wid):
+        return bytes(self.word_bytes[self.word_offsets[wid]:self.word_offsets[wid + 1]]).decode()
+
+    def child(self, node, ch):
+        lo, hi = int(self.child_start[node]), int(self.child_start[node + 1])
+        i = lo + int(np.searchsorted(self.edge_char[lo:hi], ord(ch)))
+        return i if i < hi and self.edge_char[i] == ord(ch) else -1
+
+    def find(self, prefix):
+        """Node reached by `prefix`, or -1."""
+        node = 0
+        for ch in prefix:
+            node = self.child(node, ch)
+            if node < 0:
+                break
+        return node
+
+    def __contains__(self, word):
+        node = self.find(word.lower())
+        return node >= 0 and self.node_word[node] >= 0
+
+    def complete(self, prefix, k=TOP_K):
+        """The k most frequent words starting with `prefix`."""
+        node = self.find(prefix.lower())
+        if node < 0:
+            return []
+        return [self.word(int(w)) for w in self.top[node][:k] if w >= 0]
+
+    def _fuzzy(self, prefix, max_edits, deadline):
+        """{node: edits} for trie prefixes within `max_edits` of `prefix`.
+
+        Edits are insertions, deletions, substitutions and swaps of adjacent
+        letters (optimal string alignment), computed one DP row per trie
+        edge and pruned as soon as a row's minimum exceeds `max_edits`.
+        """
+        found = {}
+        stack = [(0, list(range(len(prefix) + 1)), None, "")]
+        while stack and time.perf_counter() < deadline:
+            node, row, prev_row, prev_ch = stack.pop()
+            if row[-1] <= max_edits:
+                found[node] = row[-1]
+            for c in range(int(self.child_start[node]), int(self.child_start[node + 1])):
+                ch = chr(self.edge_char[c])
+                nxt = [row[0] + 1]
+                for j in range(1, len(row)):
+                    cost = min(nxt[j - 1] + 1, row[j] + 1, row[j - 1] + (prefix[j - 1] != ch))
+                    if j > 1 and prev_row and prefix[j - 1] == prev_ch and prefix[j - 2] == ch:
+                        cost = min(cost, prev_row[j - 2] + 1)
+                    nxt.append(cost)
+                if min(nxt) <= max_edits:
+                    stack.append((c, nxt, row, ch))
+        return found
+
+    def suggest(self, prefix, k=config.SUGGESTIONS, max_edits=config.LEXICON_MAX_EDITS,
+                budget_ms=config.LEXICON_BUDGET_MS, edit_cost=config.LEXICON_EDIT_COST):
+        """Up to k likely words for a partly spelled (possibly misrecognized) word.
+
+        Completions of `prefix` and of trie prefixes within `max_edits` edits
+        of it are ranked by log frequency minus `edit_cost` per edit. The
+        fuzzy search stops at `budget_ms`, keeping what it has found, so a
+        call fits in a frame's time budget.
+        """
+        prefix = prefix.lower()
+        if not prefix or not (prefix.isascii() and prefix.isalpha()):
+            return []
+        deadline = time.perf_counter() + budget_ms / 1000
+        candidates = {}
+        for node, edits in self._fuzzy(prefix, max_edits, deadline).items():
+            for w in self.top[node]:
+                if w < 0:
+                    break
+                w = int(w)
+                # a suggestion never drops letters already signed
+                if self.word_offsets[w + 1] - self.word_offsets[w] < len(prefix):
+                    continue
+                score = self.log_score[w] - edit_cost * edits
+                if score > candidates.get(w, -math.inf):
+                    candidates[w] = score
+        best = heapq.nlargest(k, candidates.items(), key=lambda item: item[1])
+        return [self.word(w) for w, _ in best]
+
+    def correct(self, word, max_edits=config.LEXICON_MAX_EDITS, budget_ms=config.LEXICON_BUDGET_MS):
+        """`word` if it is known, else the most frequent known word within max_edits, else None."""
+        word = word.lower()
+        if word in self:
+            return word
+        if not (word.isascii() and word.isalpha()):
+            return None
+        deadline = time.perf_counter() + budget_ms / 1000
+        matches = [(edits, -self.log_score[self.node_word[node]], int(self.node_word[node]))
+                   for node, edits in self._fuzzy(word, max_edits, deadline).items()
+                   if self.node_word[node] >= 0]
+        return self.word(min(matches)[2]) if matches else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compile and query the word-completion lexicon")
+    parser.add_argument("--words", default=config.LEXICON_WORDS, help="ranked word list")
+    parser.add_argument("--dir", default=config.LEXICON_DIR, help="compiled array directory")
+    parser.add_argument("query", nargs="*", help="prefixes to complete and correct")
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    build(read_wordlist(args.words), args.dir)
+    lex = Lexicon(args.dir)
+    print(f"{len(lex)} words, {len(lex.edge_char)} nodes, built in {time.perf_counter() - t0:.2f}s")
+    for q in args.query:
+        t0 = time.perf_counter()
+        suggestions = lex.suggest(q, k=5)
+        ms = 1000 * (time.perf_counter() - t0)
+        print(f"{q}: {suggestions}  correct={lex.correct(q)}  ({ms:.2f} ms)")
+
+
+if __name__ == "__main__":
+    main()
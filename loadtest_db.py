@@ -0,0 +1,76 @@
+import argparse
+import os
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+import config
+
+# =====================================================
+# CONCURRENT LOGIN LOAD TEST
+# =====================================================
+# Simulates many sessions logging in at once against a scratch copy of the
+# schema: each virtual user looks up its account row and records a login.
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent login load test for db.py")
+    parser.add_argument("--users", type=int, default=300, help="concurrent simulated sessions")
+    parser.add_argument("--logins", type=int, default=20, help="logins per session")
+    parser.add_argument("--db", help="database file (default: a temporary file)")
+    args = parser.parse_args()
+
+    path = args.db or os.path.join(tempfile.mkdtemp(), "loadtest.db")
+    config.DB_PATH = path
+    import db
+
+    for i in range(args.users):
+        db.create_user(f"user{i}", f"user{i}@example.com", "pw", "user")
+
+    latencies = []
+    errors = []
+    lock = threading.Lock()
+    start = threading.Barrier(args.users)
+
+    def session(i):
+        email = f"user{i}@example.com"
+        local = []
+        start.wait()
+        for _ in range(args.logins):
+            t0 = time.perf_counter()
+            try:
+                if db.find_user(email) is None:
+                    raise RuntimeError("user not found")
+                db.record_login(email)
+            except Exception as e:
+                with lock:
+                    errors.append(repr(e))
+            local.append(time.perf_counter() - t0)
+        with lock:
+            latencies.extend(local)
+
+    threads = [threading.Thread(target=session, args=(i,)) for i in range(args.users)]
+    t0 = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    request_time = time.perf_counter() - t0
+    db.writer().flush(timeout=60)
+    total_time = time.perf_counter() - t0
+
+    with db.connection() as conn:
+        stored = conn.execute("SELECT COUNT(*) FROM logins").fetchone()[0]
+    ms = np.array(latencies) * 1000
+    expected = args.users * args.logins
+    print(f"sessions: {args.users}, logins: {expected}, stored: {stored}, errors: {len(errors)}")
+    print(f"login latency p50 {np.percentile(ms, 50):.2f} ms, p99 {np.percentile(ms, 99):.2f} ms")
+    print(f"throughput {expected / request_time:.0f} logins/s, all rows committed after {total_time:.2f}s")
+    if errors:
+        print("first error:", errors[0])
+
+
+if __name__ == "__main__":
+    main()
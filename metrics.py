@@ -0,0 +1,243 @@
+import sqlite3
+import threading
+import time
+import weakref
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+import config
+import db
+
+# =====================================================
+# RING BUFFERS
+# =====================================================
+class Ring:
+    """Fixed-size float64 ring buffer; push is O(1) and allocation-free."""
+
+    def __init__(self, size):
+        self.data = np.zeros(size)
+        self.pos = 0
+        self.full = False
+
+    def push(self, value):
+        self.data[self.pos] = value
+        self.pos += 1
+        if self.pos == len(self.data):
+            self.pos = 0
+            self.full = True
+
+    def values(self):
+        return self.data if self.full else self.data[:self.pos]
+
+    def __len__(self):
+        return len(self.data) if self.full else self.pos
+
+
+class StageStats:
+    """Per-stage timings: completion times and busy durations of the last `window` frames."""
+
+    def __init__(self, window=256):
+        self.done = Ring(window)
+        self.busy = Ring(window)
+        self.count = 0
+        # seconds busy over every recorded frame, for the Prometheus _sum
+        self.total = 0.0
+
+    def record(self, started, finished):
+        self.done.push(finished)
+        self.busy.push(finished - started)
+        self.count += 1
+        self.total += finished - started
+
+    def snapshot(self):
+        done = self.done.values()
+        busy = self.busy.values() * 1000
+        span = done.max() - done.min() if len(done) > 1 else 0.0
+        return {
+            "fps": (len(done) - 1) / span if span > 0 else 0.0,
+            "ms": float(busy.mean()) if len(busy) else 0.0,
+            "p50_ms": float(np.percentile(busy, 50)) if len(busy) else 0.0,
+            "p99_ms": float(np.percentile(busy, 99)) if len(busy) else 0.0,
+            "count": self.count,
+        }
+
+
+# =====================================================
+# LIVE PIPELINES
+# =====================================================
+# pipeline -> (its stage counters when tracked, finalizer folding them into _retired)
+_live = weakref.WeakKeyDictionary()
+# {stage: [frames, busy seconds]} of pipelines no longer tracked, so the
+# Prometheus _count/_sum series never go down when a pipeline stops
+_retired = {}
+_lock = threading.Lock()
+_started = False
+_start_lock = threading.Lock()
+
+
+def _counters(stats):
+    return {stage: (s.count, s.total) for stage, s in stats.items()}
+
+
+def _retire(stats, base):
+    with _lock:
+        for stage, (count, total) in _counters(stats).items():
+            count0, total0 = base.get(stage, (0, 0.0))
+            retired = _retired.setdefault(stage, [0, 0.0])
+            retired[0] += count - count0
+            retired[1] += total - total0
+
+
+def track(pipeline):
+    """Include a running pipeline (anything with .stats {stage: StageStats}) in exports."""
+    with _lock:
+        if pipeline in _live:
+            return
+        base = _counters(pipeline.stats)
+        # also runs if the pipeline is garbage collected without untrack()
+        _live[pipeline] = (base, weakref.finalize(pipeline, _retire, pipeline.stats, base))
+
+
+def untrack(pipeline):
+    with _lock:
+        entry = _live.pop(pipeline, None)
+    if entry is not None:
+        entry[1]()
+
+
+def totals():
+    """{stage: (frames, busy ms)} over the whole process lifetime; only ever grows."""
+    with _lock:
+        result = {stage: [count, total] for stage, (count, total) in _retired.items()}
+        for pipeline, (base, _) in list(_live.items()):
+            for stage, (count, total) in _counters(pipeline.stats).items():
+                count0, total0 = base.get(stage, (0, 0.0))
+                entry = result.setdefault(stage, [0, 0.0])
+                entry[0] += count - count0
+                entry[1] += total - total0
+    return {stage: (count, 1000 * total) for stage, (count, total) in result.items()}
+
+
+def aggregate():
+    """{stage: stats} pooled over every live pipeline's ring buffers."""
+    pooled = {}
+    with _lock:
+        pipelines = list(_live.keys())
+    for pipeline in pipelines:
+        for stage, stats in pipeline.stats.items():
+            pooled.setdefault(stage, []).append(stats)
+
+    result = {}
+    for stage, stats_list in pooled.items():
+        busy = np.concatenate([s.busy.values() for s in stats_list]) * 1000
+        result[stage] = {
+            "streams": len(stats_list),
+            "fps": sum(s.snapshot()["fps"] for s in stats_list),
+            "samples": len(busy),
+            "mean_ms": float(busy.mean()) if len(busy) else 0.0,
+            "p50_ms": float(np.percentile(busy, 50)) if len(busy) else 0.0,
+            "p99_ms": float(np.percentile(busy, 99)) if len(busy) else 0.0,
+        }
+    return result
+
+
+# =====================================================
+# PROMETHEUS TEXT ENDPOINT
+# =====================================================
+def prometheus_text():
+    lines = [
+        "# HELP s2s_stage_fps Frames per second completed by each recognition stage.",
+        "# TYPE s2s_stage_fps gauge",
+    ]
+    stages = aggregate()
+    for stage, s in stages.items():
+        lines.append(f's2s_stage_fps{{stage="{stage}"}} {s["fps"]:.3f}')
+    lines += [
+        "# HELP s2s_stage_latency_ms Per-frame stage time over the recent window.",
+        "# TYPE s2s_stage_latency_ms summary",
+    ]
+    for stage, s in stages.items():
+        lines.append(f's2s_stage_latency_ms{{stage="{stage}",quantile="0.5"}} {s["p50_ms"]:.3f}')
+        lines.append(f's2s_stage_latency_ms{{stage="{stage}",quantile="0.99"}} {s["p99_ms"]:.3f}')
+    # process-wide counters, including pipelines that have since stopped
+    for stage, (count, sum_ms) in totals().items():
+        lines.append(f's2s_stage_latency_ms_sum{{stage="{stage}"}} {sum_ms:.3f}')
+        lines.append(f's2s_stage_latency_ms_count{{stage="{stage}"}} {count}')
+    lines += [
+        "# HELP s2s_active_streams Recognition pipelines currently running.",
+        "# TYPE s2s_active_streams gauge",
+        f"s2s_active_streams {len(_live)}",
+    ]
+    return "\n".join(lines) + "\n"
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path != "/metrics":
+            self.send_error(404)
+            return
+        body = prometheus_text().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+# =====================================================
+# SQLITE ROLLUPS
+# =====================================================
+# the perf_metrics table is created with the rest of the schema in db.py
+def persist(conn):
+    stages = aggregate()
+    if not stages:
+        return
+    ts = time.strftime("%Y-%m-%d %H:%M:%S")
+    conn.executemany(
+        "INSERT INTO perf_metrics VALUES(NULL,?,?,?,?,?,?,?,?)",
+        [(ts, stage, s["streams"], s["samples"], s["fps"], s["mean_ms"], s["p50_ms"], s["p99_ms"])
+         for stage, s in stages.items()],
+    )
+    conn.commit()
+
+
+def recent_p50(hours=24):
+    """[(ts, stage, p50_ms)] rollups from the last `hours` hours."""
+    with db.connection() as conn:
+        return conn.execute(
+            "SELECT ts, stage, p50_ms FROM perf_metrics WHERE ts >= datetime('now', 'localtime', ?)",
+            (f"-{hours} hours",),
+        ).fetchall()
+
+
+def _persist_loop(every):
+    while True:
+        time.sleep(every)
+        try:
+            with db.connection() as conn:
+                persist(conn)
+        except sqlite3.Error:
+            # busy database; the next rollup will catch up
+            pass
+
+
+def start(port=config.METRICS_PORT, persist_every=config.METRICS_PERSIST_EVERY):
+    """Start the /metrics endpoint and the SQLite rollup writer once per process."""
+    global _started
+    with _start_lock:
+        if _started:
+            return
+        _started = True
+    if port:
+        try:
+            server = ThreadingHTTPServer(("127.0.0.1", port), _MetricsHandler)
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+        except OSError:
+            # port taken, e.g. by another app process; keep the rollups going
+            pass
+    if persist_every:
+        threading.Thread(target=_persist_loop, args=(persist_every,), daemon=True).start()
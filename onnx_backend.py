@@ -0,0 +1,107 @@
+import ast
+import os
+
+import cv2
+import numpy as np
+
+from config import IMGSZ
+
+# =====================================================
+# LEAN PREPROCESSING (matches ultralytics classify_transforms)
+# =====================================================
+def fit_crop(roi, imgsz=IMGSZ):
+    """BGR crop -> uint8 BGR (imgsz, imgsz, 3): shorter side resize, center crop."""
+    h, w = roi.shape[:2]
+    scale = imgsz / min(h, w)
+    nh, nw = max(imgsz, round(h * scale)), max(imgsz, round(w * scale))
+    img = cv2.resize(roi, (nw, nh), interpolation=cv2.INTER_LINEAR)
+    top, left = (nh - imgsz) // 2, (nw - imgsz) // 2
+    return img[top:top + imgsz, left:left + imgsz]
+
+
+def preprocess(roi, imgsz=IMGSZ):
+    """BGR crop -> float32 (3, imgsz, imgsz): shorter side resize, center crop, RGB, [0, 1]."""
+    img = cv2.cvtColor(fit_crop(roi, imgsz), cv2.COLOR_BGR2RGB)
+    return np.ascontiguousarray(img.transpose(2, 0, 1), dtype=np.float32) / 255.0
+
+
+def preprocess_batch(rois, imgsz=IMGSZ):
+    return np.stack([preprocess(r, imgsz) for r in rois])
+
+
+# =====================================================
+# ONNX RUNTIME CLASSIFIER
+# =====================================================
+PROVIDERS = {
+    "onnx": ["CPUExecutionProvider"],
+    "onnx-int8": ["CPUExecutionProvider"],
+    "openvino": ["OpenVINOExecutionProvider", "CPUExecutionProvider"],
+}
+
+
+def names_from_train_args(model_path):
+    """{class id: name} for the classify dataset named in the training run's args.yaml, or None.
+
+    Looks next to the model, one level up (runs/.../weights/ -> runs/...)
+    and in the working directory; ultralytics orders classes by sorted
+    folder name under <data>/train.
+    """
+    model_dir = os.path.dirname(os.path.abspath(model_path))
+    for folder in (model_dir, os.path.dirname(model_dir), os.getcwd()):
+        try:
+            with open(os.path.join(folder, "args.yaml")) as f:
+                data = next((line.split(":", 1)[1].strip() for line in f if line.startswith("data:")), None)
+        except OSError:
+            continue
+        train_dir = os.path.join(data, "train") if data else None
+        if train_dir and os.path.isdir(train_dir):
+            folders = sorted(d for d in os.listdir(train_dir) if os.path.isdir(os.path.join(train_dir, d)))
+            # {id: name}, like the exported metadata and YOLO's model.names
+            return dict(enumerate(folders))
+    return None
+
+
+class OnnxClassifier:
+    """Exported sign classifier run directly with onnxruntime.
+
+    Skips the ultralytics predictor and Results objects entirely; the graph
+    already ends in a softmax, so outputs are class probabilities.
+    """
+
+    def __init__(self, path, backend="onnx", names=None, threads=0):
+        import onnxruntime as ort
+
+        opts = ort.SessionOptions()
+        opts.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            opts.intra_op_num_threads = threads
+        available = ort.get_available_providers()
+        if PROVIDERS[backend][0] not in available:
+            # falling back to CPU would make benchmarks report the wrong backend
+            raise ValueError(f"backend {backend!r} needs {PROVIDERS[backend][0]}, but onnxruntime only has "
+                             f"{available}" + (" (pip install onnxruntime-openvino)" if backend == "openvino" else ""))
+        providers = [p for p in PROVIDERS[backend] if p in available]
+        self.session = ort.InferenceSession(path, opts, providers=providers)
+        self.input_name = self.session.get_inputs()[0].name
+        self.imgsz = self.session.get_inputs()[0].shape[-1]
+        if not isinstance(self.imgsz, int):
+            self.imgsz = IMGSZ
+
+        meta = self.session.get_modelmeta().custom_metadata_map
+        if names is None and "names" in meta:
+            names = ast.literal_eval(meta["names"])
+        if names is None:
+            names = names_from_train_args(path)
+        if names is None:
+            raise ValueError(f"{path} has no class names in its metadata and none were found via args.yaml; "
+                             "re-export it with export_onnx.py or pass names=")
+        self.names = names
+
+    def predict_batch(self, rois):
+        """(n, num_classes) probabilities for a list of BGR crops."""
+        return self.session.run(None, {self.input_name: preprocess_batch(rois, self.imgsz)})[0]
+
+    def classify(self, roi):
+        probs = self.predict_batch([roi])[0]
+        top1 = int(probs.argmax())
+        return self.names[top1], float(probs[top1])
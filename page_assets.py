@@ -0,0 +1,83 @@
+import base64
+import functools
+import glob
+import hashlib
+import io
+import os
+import time
+
+from PIL import Image
+
+# =====================================================
+# BACKGROUND ASSETS
+# =====================================================
+# Backgrounds are converted once per process to WebP at screen resolution.
+# With static serving enabled (.streamlit/config.toml) they are written to
+# static/bg/ under a content-hashed name and referenced by URL, so the
+# browser caches them and each rerun only sends a short CSS rule. Without
+# it, the WebP data URI is built once and reused.
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static")
+BG_DIR = os.path.join(STATIC_DIR, "bg")
+MAX_SIZE = (1920, 1080)
+QUALITY = 80
+
+
+def _static_serving_enabled():
+    path = os.path.join(os.path.dirname(STATIC_DIR), ".streamlit", "config.toml")
+    try:
+        with open(path) as f:
+            return any(line.replace(" ", "").lower().startswith("enablestaticserving=true") for line in f)
+    except OSError:
+        return False
+
+
+def to_webp(image_path, max_size=MAX_SIZE, quality=QUALITY):
+    img = Image.open(image_path)
+    img.thumbnail(max_size, Image.LANCZOS)
+    if img.mode not in ("RGB", "RGBA"):
+        img = img.convert("RGB")
+    buf = io.BytesIO()
+    img.save(buf, "WEBP", quality=quality, method=6)
+    return buf.getvalue()
+
+
+@functools.lru_cache(maxsize=None)
+def background_url(image_path):
+    """CSS url(...) for a background image, computed once per process."""
+    data = to_webp(image_path)
+    if _static_serving_enabled():
+        digest = hashlib.sha1(data).hexdigest()[:12]
+        name = f"{os.path.splitext(os.path.basename(image_path))[0]}.{digest}.webp"
+        os.makedirs(BG_DIR, exist_ok=True)
+        path = os.path.join(BG_DIR, name)
+        if not os.path.exists(path):
+            with open(path, "wb") as f:
+                f.write(data)
+        return f'url("app/static/bg/{name}")'
+    return f'url("data:image/webp;base64,{base64.b64encode(data).decode()}")'
+
+
+# =====================================================
+# BEFORE / AFTER REPORT
+# =====================================================
+def main():
+    print(f"{'asset':<22} {'png KB':>8} {'inline KB':>10} {'webp KB':>8} {'css/rerun KB':>13} "
+          f"{'before ms':>10} {'after ms':>9}")
+    for path in sorted(glob.glob("assets/*.png")):
+        t0 = time.perf_counter()
+        with open(path, "rb") as f:
+            inline = base64.b64encode(f.read()).decode()
+        before_ms = 1000 * (time.perf_counter() - t0)
+
+        background_url(path)
+        t0 = time.perf_counter()
+        url = background_url(path)
+        after_ms = 1000 * (time.perf_counter() - t0)
+
+        print(f"{os.path.basename(path):<22} {os.path.getsize(path) / 1024:>8.0f} {len(inline) / 1024:>10.0f} "
+              f"{len(to_webp(path)) / 1024:>8.0f} {len(url) / 1024:>13.1f} {before_ms:>10.2f} {after_ms:>9.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,236 @@
+import threading
+import time
+from collections import deque
+
+import cv2
+
+import metrics
+import registry
+from gating import PoseGate
+from metrics import StageStats
+from recognition import hand_box, observe_hand
+
+
+# =====================================================
+# BOUNDED "LATEST WINS" QUEUE
+# =====================================================
+class LatestQueue:
+    """Bounded queue that drops the oldest item instead of blocking the producer."""
+
+    def __init__(self, maxsize=1):
+        self.items = deque()
+        self.maxsize = maxsize
+        self.dropped = 0
+        self.cond = threading.Condition()
+
+    def put(self, item):
+        with self.cond:
+            if len(self.items) >= self.maxsize:
+                self.items.popleft()
+                self.dropped += 1
+            self.items.append(item)
+            self.cond.notify()
+
+    def get(self, timeout=None):
+        with self.cond:
+            if not self.items:
+                self.cond.wait(timeout)
+            if not self.items:
+                return None
+            return self.items.popleft()
+
+    def __len__(self):
+        return len(self.items)
+
+
+# =====================================================
+# CAPTURE -> DETECT -> CLASSIFY ENGINE
+# =====================================================
+class RecognitionPipeline:
+    """Runs capture, hand detection and classification in separate threads.
+
+    Stages are linked by LatestQueues, so a slow stage only ever sees the
+    newest frame and the camera never stalls behind inference. The caller
+    (the Streamlit script thread) is the UI stage: latest() hands it the
+    newest captured frame straight from the capture stage, with the most
+    recent hand box and text drawn from whatever detection and
+    classification have finished, so the preview runs at camera speed
+    however slow recognition is. Workers stop on stop(), or on their own once
+    nobody has polled for idle_timeout seconds (e.g. the browser tab closed).
+
+    With `hands` None the pipeline creates and warms its own tracking graph
+    in the detect thread, so start() returns at once, and closes it on
+    stop(); tracking state never crosses sessions. The camera is acquired
+    on start and released when the workers stop.
+    """
+
+    STAGES = ("capture", "detect", "classify", "ui")
+
+    def __init__(self, camera, hands, recognizer, assembler, queue_size=1, idle_timeout=5.0):
+        self.camera = camera
+        self.hands = hands
+        self.owns_hands = hands is None
+        self.recognizer = recognizer
+        self.assembler = assembler
+        if assembler.uses_probs:
+            assembler.names = recognizer.names
+        self.gate = PoseGate()
+        self.idle_timeout = idle_timeout
+
+        self.frames = LatestQueue(queue_size)
+        self.detections = LatestQueue(queue_size)
+        self.preview = LatestQueue(1)
+        # newest results, replaced whole so the UI never sees a torn update
+        self.box = None
+        self.text = ("", "")
+        self.stats = {name: StageStats() for name in self.STAGES}
+
+        self.running = threading.Event()
+        self.last_poll = time.time()
+        self.threads = []
+        self.error = None
+        self.holds_camera = False
+        self.lock = threading.Lock()
+
+    def start(self):
+        if self.running.is_set():
+            return
+        with self.lock:
+            self.camera.acquire()
+            self.holds_camera = True
+        self.running.set()
+        self.last_poll = time.time()
+        metrics.track(self)
+        self.threads = [
+            threading.Thread(target=self._loop, args=(self._capture,), daemon=True),
+            threading.Thread(target=self._loop, args=(self._detect,), kwargs={"setup": self._load_hands},
+                             daemon=True),
+            threading.Thread(target=self._loop, args=(self._classify,), daemon=True),
+        ]
+        for t in self.threads:
+            t.start()
+
+    def stop(self):
+        self.running.clear()
+        metrics.untrack(self)
+        for t in self.threads:
+            t.join(timeout=2.0)
+        self.threads = []
+        self._release_camera()
+        if self.owns_hands:
+            with self.lock:
+                hands, self.hands = self.hands, None
+            if hands is not None:
+                hands.close()
+
+    def _release_camera(self):
+        # once per start(), whether stop() or an idle/failed worker gets here first
+        with self.lock:
+            if self.holds_camera:
+                self.holds_camera = False
+                self.camera.release()
+
+    @property
+    def alive(self):
+        return self.running.is_set()
+
+    def _loop(self, step, setup=None):
+        if setup is not None:
+            try:
+                setup()
+            except Exception as e:
+                self._fail(e)
+        while self.running.is_set():
+            if time.time() - self.last_poll > self.idle_timeout:
+                self.running.clear()
+                metrics.untrack(self)
+                self._release_camera()
+                break
+            try:
+                step()
+            except Exception as e:
+                self._fail(e)
+
+    def _fail(self, error):
+        # surfaced to the UI thread by latest()
+        self.error = error
+        self.running.clear()
+        self._release_camera()
+
+    def _load_hands(self):
+        if not self.owns_hands or self.hands is not None:
+            return
+        hands = registry.load_hands()
+        with self.lock:
+            if self.running.is_set():
+                self.hands = hands
+                return
+        # stop() came while the graph was loading
+        hands.close()
+
+    # ---------------- stages ----------------
+    def _capture(self):
+        t0 = time.perf_counter()
+        ret, frame = self.camera.read()
+        if not ret:
+            time.sleep(0.01)
+            return
+        frame = cv2.flip(frame, 1)
+        self.frames.put((time.time(), frame))
+        self.preview.put(frame)
+        self.stats["capture"].record(t0, time.perf_counter())
+
+    def _detect(self):
+        item = self.frames.get(timeout=0.1)
+        if item is None:
+            return
+        t0 = time.perf_counter()
+        ts, frame = item
+        rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        result = self.hands.process(rgb)
+        landmarks = result.multi_hand_landmarks[0] if result.multi_hand_landmarks else None
+        box = hand_box(frame, landmarks) if landmarks is not None else None
+        self.box = box
+        self.detections.put((ts, frame, landmarks, box))
+        self.stats["detect"].record(t0, time.perf_counter())
+
+    def _classify(self):
+        item = self.detections.get(timeout=0.1)
+        if item is None:
+            return
+        t0 = time.perf_counter()
+        ts, frame, landmarks, _ = item
+        if landmarks is None:
+            self.gate.reset()
+            self.assembler.no_hand(ts)
+        else:
+            observe_hand(self.assembler, self.recognizer, frame, landmarks, ts, self.gate)
+        self.text = (self.assembler.current_word, self.assembler.sentence)
+        self.stats["classify"].record(t0, time.perf_counter())
+
+    # ---------------- UI side ----------------
+    def latest(self, timeout=1.0):
+        """(newest frame, last hand box, current word, sentence), or None if no frame came within timeout."""
+        self.last_poll = time.time()
+        if self.error is not None:
+            error, self.error = self.error, None
+            raise error
+        frame = self.preview.get(timeout=timeout)
+        if frame is None:
+            return None
+        word, sentence = self.text
+        return frame, self.box, word, sentence
+
+    def rendered(self, started):
+        self.stats["ui"].record(started, time.perf_counter())
+
+    def report(self):
+        report = {name: s.snapshot() for name, s in self.stats.items()}
+        report["capture"]["queue"] = len(self.frames)
+        report["capture"]["dropped"] = self.frames.dropped
+        report["detect"]["queue"] = len(self.detections)
+        report["detect"]["dropped"] = self.detections.dropped
+        report["ui"]["queue"] = len(self.preview)
+        report["ui"]["dropped"] = self.preview.dropped
+        report["classify"]["gated"] = self.gate.skipped
+        return report
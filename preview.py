@@ -0,0 +1,68 @@
+import time
+
+import cv2
+
+from config import PREVIEW_FPS, PREVIEW_WIDTH, PREVIEW_FORMAT, PREVIEW_QUALITY, PREVIEW_DRAW_BOX
+
+ENCODE_PARAMS = {
+    "jpeg": (".jpg", cv2.IMWRITE_JPEG_QUALITY),
+    "webp": (".webp", cv2.IMWRITE_WEBP_QUALITY),
+}
+
+
+# =====================================================
+# ADAPTIVE PREVIEW
+# =====================================================
+class Previewer:
+    """Decides which frames reach the browser and encodes them once.
+
+    Frames are shown at most `target_fps` times per second, downscaled to
+    `max_width` and encoded to JPEG/WebP here, so Streamlit ships the bytes
+    as-is instead of re-encoding a full-resolution array. Streamlit gives no
+    acknowledgement from the browser, so the time spent pushing each image
+    is used as the backpressure signal: when pushes get slow the preview
+    interval stretches, and a lagging session gets fewer frames instead of
+    a growing backlog.
+    """
+
+    def __init__(self, target_fps=PREVIEW_FPS, max_width=PREVIEW_WIDTH, fmt=PREVIEW_FORMAT,
+                 quality=PREVIEW_QUALITY, draw_box=PREVIEW_DRAW_BOX):
+        self.interval = 1.0 / target_fps
+        self.max_width = max_width
+        self.ext, quality_flag = ENCODE_PARAMS[fmt]
+        self.params = [quality_flag, quality]
+        self.draw_box = draw_box
+        self.next_due = 0.0
+        self.push_time = 0.0
+        self.shown = 0
+        self.skipped = 0
+
+    def encode(self, frame, box=None):
+        h, w = frame.shape[:2]
+        scale = min(1.0, self.max_width / w)
+        if scale < 1.0:
+            frame = cv2.resize(frame, (int(w * scale), int(h * scale)), interpolation=cv2.INTER_AREA)
+        elif self.draw_box and box is not None:
+            frame = frame.copy()
+        if self.draw_box and box is not None:
+            x0, y0, x1, y1 = (int(v * scale) for v in box)
+            cv2.rectangle(frame, (x0, y0), (x1, y1), (255, 247, 0), 2)
+        ok, buf = cv2.imencode(self.ext, frame, self.params)
+        return buf.tobytes() if ok else None
+
+    def show(self, image_box, frame, box=None):
+        """Render `frame` into a st.image placeholder if one is due; returns True if shown."""
+        now = time.perf_counter()
+        if now < self.next_due:
+            self.skipped += 1
+            return False
+
+        data = self.encode(frame, box)
+        if data is None:
+            return False
+        t0 = time.perf_counter()
+        image_box.image(data)
+        self.push_time = 0.8 * self.push_time + 0.2 * (time.perf_counter() - t0)
+        self.next_due = now + max(self.interval, 2 * self.push_time)
+        self.shown += 1
+        return True
@@ -0,0 +1,70 @@
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+# =====================================================
+# IMPORT-TIME PROFILE
+# =====================================================
+# Each import set runs in a fresh interpreter, so nothing is already in
+# sys.modules; the wall time is what a cold Streamlit process pays before it
+# can render the first page.
+
+# what app2/app3 imported at the top before the heavy modules went lazy
+EAGER = ["streamlit", "db", "metrics", "page_assets", "admin_views",
+         "cv2", "mediapipe", "ultralytics", "pandas",
+         "registry", "recognition", "pipeline", "preview", "tts_edge"]
+
+# what the login and admin pages import now
+LOGIN = ["streamlit", "db", "registry", "metrics", "config", "page_assets", "admin_views"]
+
+HEAVY = ["cv2", "mediapipe", "ultralytics", "pandas", "edge_tts", "onnxruntime",
+         "recognition", "pipeline", "preview", "tts_edge"]
+
+PROBE = """
+import importlib, json, sys, time
+missing = []
+t0 = time.perf_counter()
+for name in sys.argv[1:]:
+    try:
+        importlib.import_module(name)
+    except ImportError:
+        missing.append(name)
+print(json.dumps({"ms": 1000 * (time.perf_counter() - t0), "missing": missing}))
+"""
+
+
+def measure(modules, repeat=3):
+    runs = []
+    for _ in range(repeat):
+        out = subprocess.run([sys.executable, "-c", PROBE, *modules],
+                             capture_output=True, text=True, check=True).stdout
+        runs.append(json.loads(out.strip().splitlines()[-1]))
+    return {
+        "ms": statistics.median(r["ms"] for r in runs),
+        "missing": runs[0]["missing"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cold import cost of the app's startup path")
+    parser.add_argument("--repeat", type=int, default=3, help="fresh interpreters per measurement")
+    parser.add_argument("--modules", action="store_true", help="also time each heavy module on its own")
+    args = parser.parse_args()
+
+    report = {
+        "before (eager imports)": measure(EAGER, args.repeat),
+        "after (login page)": measure(LOGIN, args.repeat),
+    }
+    if args.modules:
+        for name in HEAVY:
+            report[name] = measure([name], args.repeat)
+
+    for name, r in report.items():
+        missing = f"  (not installed: {', '.join(r['missing'])})" if r["missing"] else ""
+        print(f"{name:<24} {r['ms']:8.1f} ms{missing}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,377 @@
+import time
+
+import cv2
+import numpy as np
+
+from config import (CONF_THRESHOLD, STABLE_FRAMES, SPACE_TIME, MIN_ROI_SIZE,
+                    DECODER, DECODERS, DECODER_WINDOW, DECODER_ENTER, DECODER_EXIT,
+                    SUGGESTIONS, LEXICON_AUTOCORRECT)
+
+# =====================================================
+# HAND CROP
+# =====================================================
+def hand_box(frame, hand_landmarks):
+    """Landmark bounding box clipped to the frame, or None if it is degenerate."""
+    h, w, _ = frame.shape
+    lm = hand_landmarks.landmark
+    xs = [int(p.x * w) for p in lm]
+    ys = [int(p.y * h) for p in lm]
+    x0, x1 = max(min(xs), 0), min(max(xs), w)
+    y0, y1 = max(min(ys), 0), min(max(ys), h)
+    if x1 - x0 < MIN_ROI_SIZE or y1 - y0 < MIN_ROI_SIZE:
+        return None
+    return x0, y0, x1, y1
+
+
+def hand_roi(frame, hand_landmarks):
+    box = hand_box(frame, hand_landmarks)
+    if box is None:
+        return None
+    x0, y0, x1, y1 = box
+    return frame[y0:y1, x0:x1]
+
+
+def classify_roi(model, roi):
+    if roi is None:
+        return None, 0.0
+    results = model(roi, verbose=False)
+    probs = results[0].probs
+    if not probs:
+        return None, 0.0
+    return model.names[int(probs.top1)], float(probs.top1conf)
+
+
+def class_names(names):
+    """model.names as a list indexed by class id (YOLO gives a dict)."""
+    return [names[i] for i in range(len(names))]
+
+
+class RoiRecognizer:
+    """Crop the hand and run the image classifier on it.
+
+    `model` is any backend exposing classify(roi) -> (letter, conf); probs()
+    also uses predict_batch(rois) when the backend has it.
+    """
+
+    def __init__(self, model):
+        self.model = model
+        self.names = model.names
+        self.index = {name: i for i, name in enumerate(class_names(model.names))}
+
+    def __call__(self, frame, hand_landmarks):
+        roi = hand_roi(frame, hand_landmarks)
+        if roi is None:
+            return None, 0.0
+        return self.model.classify(roi)
+
+    def probs(self, frame, hand_landmarks):
+        """Class-probability vector for the hand crop, or None if there is no usable crop."""
+        roi = hand_roi(frame, hand_landmarks)
+        if roi is None:
+            return None
+        if hasattr(self.model, "predict_batch"):
+            return self.model.predict_batch([roi])[0]
+        # top-1 only backends (the inference server): all mass on the predicted class
+        letter, conf = self.model.classify(roi)
+        probs = np.zeros(len(self.index), dtype=np.float32)
+        if letter is not None:
+            probs[self.index[letter]] = conf
+        return probs
+
+
+# =====================================================
+# LETTER / WORD STATE MACHINE
+# =====================================================
+class LetterAssembler:
+    """Turns per-frame predictions into letters and words.
+
+    A letter is committed after STABLE_FRAMES consecutive frames agree on it
+    above CONF_THRESHOLD; a word is committed once no hand has been seen for
+    SPACE_TIME seconds. With a `lexicon` set, `suggestions` holds completions
+    of the current letters (refreshed per committed letter) and accept()
+    commits one of them as the word.
+    """
+
+    # feeds on (letter, conf) via observe(); WindowAssembler takes probabilities
+    uses_probs = False
+
+    def __init__(self, conf_threshold=CONF_THRESHOLD, stable_frames=STABLE_FRAMES,
+                 space_time=SPACE_TIME):
+        self.conf_threshold = conf_threshold
+        self.stable_frames = stable_frames
+        self.space_time = space_time
+        # called with each committed word, from whichever thread feeds frames
+        self.on_word = None
+        # optional event_log.EventRecorder; gets every committed letter and word
+        self.recorder = None
+        self.lexicon = None
+        self.autocorrect = LEXICON_AUTOCORRECT
+        self.reset()
+
+    def reset(self, now=None):
+        self.letters = []
+        self.words = []
+        self.suggestions = []
+        self.last_letter = None
+        self.last_conf = 0.0
+        self.stable_count = 0
+        # hand frames seen since the last committed letter
+        self.frames = 0
+        self.last_hand_time = time.time() if now is None else now
+
+    def no_hand(self, now=None):
+        now = time.time() if now is None else now
+        if self.letters and now - self.last_hand_time > self.space_time:
+            word = self.current_word
+            if self.autocorrect and self.lexicon is not None:
+                word = self._match_case(self.lexicon.correct(word) or word)
+            return self._commit_word(word)
+        return None
+
+    def accept(self, index=0):
+        """Commit suggestion `index` in place of the letters signed so far; returns the word or None."""
+        suggestions = self.suggestions
+        if index >= len(suggestions):
+            return None
+        return self._commit_word(self._match_case(suggestions[index]))
+
+    def _match_case(self, word):
+        return word.upper() if self.current_word.isupper() else word
+
+    def _commit_word(self, word):
+        self.words.append(word)
+        self.letters.clear()
+        self.suggestions = []
+        if self.recorder is not None:
+            self.recorder.word(word)
+        if self.on_word:
+            self.on_word(word)
+        return word
+
+    def _commit_letter(self, letter, conf):
+        self.letters.append(letter)
+        self.last_conf = conf
+        frames, self.frames = self.frames, 0
+        if self.recorder is not None:
+            self.recorder.letter(letter, conf, frames)
+        if self.lexicon is not None:
+            self.suggestions = self.lexicon.suggest(self.current_word, SUGGESTIONS)
+        return letter
+
+    def observe(self, letter, conf, now=None):
+        """Feed the top-1 prediction for a frame with a hand; returns a committed letter or None."""
+        self.last_hand_time = time.time() if now is None else now
+        self.frames += 1
+
+        if letter is None or conf <= self.conf_threshold:
+            return None
+
+        if letter == self.last_letter:
+            self.stable_count += 1
+        else:
+            self.last_letter = letter
+            self.stable_count = 1
+
+        if self.stable_count >= self.stable_frames:
+            self.stable_count = 0
+            return self._commit_letter(letter, conf)
+        return None
+
+    @property
+    def current_word(self):
+        return "".join(self.letters)
+
+    @property
+    def sentence(self):
+        return " ".join(self.words)
+
+
+# =====================================================
+# PROBABILITY-WINDOW DECODER
+# =====================================================
+class ProbabilityWindow:
+    """The last `size` class-probability vectors in a (size, num_classes) ring.
+
+    mean() is O(num_classes): a running sum is updated on every push and
+    recomputed from the ring once per wrap so float error can't build up.
+    """
+
+    def __init__(self, size, num_classes):
+        self.ring = np.zeros((size, num_classes), dtype=np.float32)
+        self.total = np.zeros(num_classes)
+        self.pos = 0
+
+    def push(self, probs):
+        self.total -= self.ring[self.pos]
+        if probs is None:
+            self.ring[self.pos] = 0.0
+        else:
+            self.ring[self.pos] = probs
+            self.total += self.ring[self.pos]
+        self.pos += 1
+        if self.pos == len(self.ring):
+            self.pos = 0
+            self.total = self.ring.sum(axis=0, dtype=np.float64)
+
+    def mean(self):
+        return self.total / len(self.ring)
+
+    def clear(self):
+        self.ring[:] = 0.0
+        self.total[:] = 0.0
+        self.pos = 0
+
+
+class WindowAssembler(LetterAssembler):
+    """Commits letters from smoothed class probabilities instead of a run of identical top-1s.
+
+    Each frame's full probability vector (over every class in `names`) goes
+    into a window of the last `window` frames, missing frames count as zero,
+    and a letter commits once its mean score reaches `enter`. A noisy frame
+    only dents the mean instead of restarting a count, so letters commit in
+    fewer frames. The committed letter then stays latched until its score
+    falls below `exit`: holding a sign doesn't repeat it, while the short
+    dip between the two halves of a double letter is enough to commit it
+    again without dropping the hand. Words still end after SPACE_TIME
+    without a hand.
+    """
+
+    uses_probs = True
+
+    def __init__(self, names=None, window=DECODER_WINDOW, enter=DECODER_ENTER, exit=DECODER_EXIT,
+                 space_time=SPACE_TIME):
+        self.window_size = window
+        self.enter = enter
+        self.exit = exit
+        self.window = None
+        self._names = None
+        super().__init__(space_time=space_time)
+        if names is not None:
+            self.names = names
+
+    @property
+    def names(self):
+        return self._names
+
+    @names.setter
+    def names(self, names):
+        # a different recognizer (other classes) starts a fresh window
+        names = class_names(names)
+        if names != self._names:
+            self._names = names
+            self.index = {name: i for i, name in enumerate(names)}
+            self.window = ProbabilityWindow(self.window_size, len(names))
+            self.latched = None
+
+    def reset(self, now=None):
+        super().reset(now)
+        self.latched = None
+        if self.window is not None:
+            self.window.clear()
+
+    def no_hand(self, now=None):
+        if self.window is not None:
+            self.window.clear()
+        self.latched = None
+        return super().no_hand(now)
+
+    def observe_probs(self, probs, now=None):
+        """Feed one frame's probabilities (None: hand seen, no usable crop); returns a committed letter or None."""
+        self.last_hand_time = time.time() if now is None else now
+        self.frames += 1
+        self.window.push(probs)
+        scores = self.window.mean()
+
+        if self.latched is not None and scores[self.latched] < self.exit:
+            self.latched = None
+        best = int(scores.argmax())
+        if best == self.latched or scores[best] < self.enter:
+            return None
+
+        self.latched = best
+        return self._commit_letter(self._names[best], float(scores[best]))
+
+    def observe(self, letter, conf, now=None):
+        """Top-1 input, for callers without probabilities: all mass on the predicted class."""
+        probs = None
+        if letter is not None:
+            probs = np.zeros(len(self._names), dtype=np.float32)
+            probs[self.index[letter]] = conf
+        return self.observe_probs(probs, now)
+
+
+def make_assembler(names=None, decoder=DECODER):
+    """The letter decoder selected by config.DECODER."""
+    if decoder == "window":
+        return WindowAssembler(names)
+    if decoder == "stable":
+        return LetterAssembler()
+    raise ValueError(f"unknown decoder {decoder!r}, expected one of {DECODERS}")
+
+
+def observe_hand(assembler, recognizer, frame, hand_landmarks, now, gate=None):
+    """Classify a frame with a hand (through `gate`, if any) and feed the assembler.
+
+    Probability decoders get the recognizer's full probs() vector, the
+    counter gets its (letter, conf). Returns a committed letter or None.
+    """
+    if assembler.uses_probs:
+        predict = recognizer.probs
+        probs = gate(predict, frame, hand_landmarks) if gate else predict(frame, hand_landmarks)
+        return assembler.observe_probs(probs, now)
+    letter, conf = gate(recognizer, frame, hand_landmarks) if gate else recognizer(frame, hand_landmarks)
+    return assembler.observe(letter, conf, now)
+
+
+# =====================================================
+# SEQUENTIAL STREAM RECOGNIZER (offline / headless use)
+# =====================================================
+class StreamRecognizer:
+    """The sign_to_speech() steps for one stream, without UI or pacing.
+
+    process() takes a BGR frame and its timestamp and returns the events it
+    produced: {"type": "letter" | "word", ...} dicts.
+    """
+
+    def __init__(self, hands, recognizer, assembler=None, gate=None, flip=True):
+        self.hands = hands
+        self.recognizer = recognizer
+        self.assembler = assembler or make_assembler()
+        if self.assembler.uses_probs:
+            self.assembler.names = recognizer.names
+        self.gate = gate
+        self.flip = flip
+        self.last_ts = 0.0
+
+    def process(self, frame, ts):
+        if self.flip:
+            frame = cv2.flip(frame, 1)
+        result = self.hands.process(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+        landmarks = result.multi_hand_landmarks[0] if result.multi_hand_landmarks else None
+        return self.process_landmarks(landmarks, frame, ts)
+
+    def process_landmarks(self, landmarks, frame, ts):
+        self.last_ts = ts
+        if landmarks is None:
+            if self.gate:
+                self.gate.reset()
+            word = self.assembler.no_hand(ts)
+            return [{"t": round(ts, 3), "type": "word", "word": word}] if word else []
+
+        letter = observe_hand(self.assembler, self.recognizer, frame, landmarks, ts, self.gate)
+        if letter:
+            return [{"t": round(ts, 3), "type": "letter", "letter": letter,
+                     "conf": round(self.assembler.last_conf, 4)}]
+        return []
+
+    def finish(self):
+        """Commit a word left open at the end of the stream and emit the sentence."""
+        ts = round(self.last_ts, 3)
+        events = []
+        if self.assembler.letters:
+            word = self.assembler.current_word
+            self.assembler.words.append(word)
+            self.assembler.letters.clear()
+            events.append({"t": ts, "type": "word", "word": word})
+        events.append({"t": ts, "type": "sentence", "sentence": self.assembler.sentence.capitalize()})
+        return events
@@ -0,0 +1,225 @@
+import importlib
+import threading
+import time
+
+import numpy as np
+
+import config
+from landmark_classifier import LandmarkClassifier
+
+# =====================================================
+# PROCESS-WIDE MODEL / RESOURCE REGISTRY
+# =====================================================
+# Streamlit re-executes the app script on every interaction, but imported
+# modules stay loaded, so everything kept here is created once per process
+# and shared by every session.
+#
+# OpenCV, MediaPipe and the model backends are imported inside the loaders,
+# not at the top of this module, so the login and admin pages never pay for
+# them; the first page that needs a model (or preload()) brings them in.
+
+# what the live translation page imports on first render
+LIVE_MODULES = ("cv2", "recognition", "pipeline", "preview", "tts_edge")
+
+_lock = threading.Lock()
+_key_locks = {}
+_resources = {}
+_stats = {}
+
+
+class SharedModel:
+    """YOLO classifier shared across sessions; calls are serialized."""
+
+    def __init__(self, model):
+        self.model = model
+        self.names = model.names
+        self.lock = threading.Lock()
+
+    def __call__(self, source, **kwargs):
+        with self.lock:
+            return self.model(source, **kwargs)
+
+    def classify(self, roi):
+        from recognition import classify_roi
+
+        return classify_roi(self, roi)
+
+    def predict_batch(self, rois):
+        """(n, num_classes) probabilities for a list of BGR crops."""
+        results = self(list(rois), verbose=False)
+        return np.stack([r.probs.data.cpu().numpy() for r in results])
+
+
+class SharedCamera:
+    """Single capture handle per process, reopened when it goes stale.
+
+    Every user (a running pipeline) acquire()s it and release()s it when
+    done; the device is only closed once the last user has released it.
+    """
+
+    def __init__(self, index):
+        self.index = index
+        self.cap = None
+        self.users = 0
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        with self.lock:
+            self.users += 1
+
+    def read(self):
+        import cv2
+
+        with self.lock:
+            if self.users == 0:
+                return False, None
+            if self.cap is None or not self.cap.isOpened():
+                self.cap = cv2.VideoCapture(self.index, cv2.CAP_DSHOW)
+            return self.cap.read()
+
+    def release(self):
+        with self.lock:
+            self.users = max(0, self.users - 1)
+            if self.users == 0 and self.cap is not None:
+                self.cap.release()
+                self.cap = None
+
+
+def _get(key, factory):
+    # one lock per resource so a slow model load never blocks other lookups
+    with _lock:
+        key_lock = _key_locks.setdefault(key, threading.Lock())
+    with key_lock:
+        if key not in _resources:
+            _resources[key] = factory()
+        return _resources[key]
+
+
+def _load_model():
+    t0 = time.perf_counter()
+    if config.BACKEND == "torch":
+        from ultralytics import YOLO
+
+        model = SharedModel(YOLO(config.MODEL_PATH))
+    elif config.BACKEND in ("onnx", "openvino", "onnx-int8"):
+        from onnx_backend import OnnxClassifier
+
+        path = config.ONNX_INT8_MODEL_PATH if config.BACKEND == "onnx-int8" else config.ONNX_MODEL_PATH
+        model = OnnxClassifier(path, config.BACKEND)
+    elif config.BACKEND == "remote":
+        from inference_server import RemoteClassifier
+
+        model = RemoteClassifier(config.INFERENCE_ADDR)
+    else:
+        raise ValueError(f"unknown backend {config.BACKEND!r}, expected one of {config.BACKENDS}")
+    t1 = time.perf_counter()
+    model.classify(np.zeros((config.IMGSZ, config.IMGSZ, 3), dtype=np.uint8))
+    t2 = time.perf_counter()
+    _stats["backend"] = config.BACKEND
+    _stats["model_load_s"] = t1 - t0
+    _stats["model_warmup_s"] = t2 - t1
+    return model
+
+
+def create_hands(static_image_mode=False):
+    """A fresh, unshared MediaPipe Hands graph, in tracking mode unless asked otherwise (one per video stream)."""
+    import mediapipe as mp
+
+    return mp.solutions.hands.Hands(
+        static_image_mode=static_image_mode,
+        max_num_hands=1,
+        model_complexity=config.HANDS_COMPLEXITY,
+        min_detection_confidence=config.HANDS_DETECTION_CONF,
+        min_tracking_confidence=config.HANDS_TRACKING_CONF,
+    )
+
+
+def load_hands():
+    """create_hands() with one blank frame run through it, so its first real frame isn't slow."""
+    t0 = time.perf_counter()
+    hands = create_hands()
+    t1 = time.perf_counter()
+    hands.process(np.zeros((480, 640, 3), dtype=np.uint8))
+    t2 = time.perf_counter()
+    _stats["hands_load_s"] = t1 - t0
+    _stats["hands_warmup_s"] = t2 - t1
+    return hands
+
+
+def get_model():
+    return _get("model", _load_model)
+
+
+def _load_landmark_classifier():
+    t0 = time.perf_counter()
+    clf = LandmarkClassifier.load(config.LANDMARK_MODEL_PATH)
+    _stats["landmarks_load_s"] = time.perf_counter() - t0
+    return clf
+
+
+def get_landmark_classifier():
+    return _get("landmarks", _load_landmark_classifier)
+
+
+def get_recognizer(mode=None):
+    """Per-frame letter recognizer: callable(frame, hand_landmarks) -> (letter, conf)."""
+    mode = mode or config.RECOGNIZER
+    if mode == "landmarks":
+        return get_landmark_classifier()
+    if mode == "yolo":
+        from recognition import RoiRecognizer
+
+        return _get("recognizer_yolo", lambda: RoiRecognizer(get_model()))
+    raise ValueError(f"unknown recognizer {mode!r}, expected one of {config.RECOGNIZERS}")
+
+
+def _load_lexicon():
+    from lexicon import Lexicon
+
+    t0 = time.perf_counter()
+    lex = Lexicon.load(config.LEXICON_WORDS, config.LEXICON_DIR)
+    _stats["lexicon_load_s"] = time.perf_counter() - t0
+    return lex
+
+
+def get_lexicon():
+    """Word-completion trie, compiled on first use and memory-mapped."""
+    return _get("lexicon", _load_lexicon)
+
+
+def get_camera():
+    return _get("camera", lambda: SharedCamera(config.CAMERA_INDEX))
+
+
+def warm_imports(modules=LIVE_MODULES):
+    t0 = time.perf_counter()
+    for name in modules:
+        importlib.import_module(name)
+    _stats["imports_s"] = time.perf_counter() - t0
+
+
+def load_all():
+    # hand graphs are per pipeline (see RecognitionPipeline), so only the
+    # mediapipe import itself can be done ahead of time
+    warm_imports(LIVE_MODULES + ("mediapipe",))
+    get_recognizer()
+    get_lexicon()
+    return load_stats()
+
+
+def preload():
+    """Start importing and loading in the background once per process (safe to call every rerun).
+
+    Called after a successful login, so the live page usually finds
+    everything ready; the login form itself never waits on it.
+    """
+    with _lock:
+        if "preload" in _resources:
+            return
+        t = threading.Thread(target=load_all, daemon=True)
+        _resources["preload"] = t
+    t.start()
+
+
+def load_stats():
+    return dict(_stats)
@@ -0,0 +1,102 @@
+import argparse
+import json
+import os
+import sys
+from multiprocessing import Pool
+
+import cv2
+
+import config
+import registry
+from gating import PoseGate
+from recognition import StreamRecognizer
+
+IMAGE_EXTS = (".jpg", ".jpeg", ".png", ".bmp", ".webp")
+
+
+# =====================================================
+# FRAME SOURCES
+# =====================================================
+def iter_frames(source, fps=30.0):
+    """Yield (timestamp_s, BGR frame) from a video file or a directory of images."""
+    if os.path.isdir(source):
+        names = sorted(f for f in os.listdir(source) if f.lower().endswith(IMAGE_EXTS))
+        for i, name in enumerate(names):
+            frame = cv2.imread(os.path.join(source, name))
+            if frame is not None:
+                yield i / fps, frame
+        return
+
+    cap = cv2.VideoCapture(source)
+    video_fps = cap.get(cv2.CAP_PROP_FPS) or fps
+    i = 0
+    try:
+        while True:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            yield i / video_fps, frame
+            i += 1
+    finally:
+        cap.release()
+
+
+# =====================================================
+# RECOGNITION (same steps as sign_to_speech, no UI, no pacing)
+# =====================================================
+def recognize(source, mode=None, fps=30.0, flip=True, gate=True):
+    recognizer = registry.get_recognizer(mode)
+    events = []
+    with registry.create_hands() as hands:
+        stream = StreamRecognizer(hands, recognizer, None, PoseGate() if gate else None, flip)
+        stream.assembler.reset(now=0.0)
+        for ts, frame in iter_frames(source, fps):
+            events.extend(stream.process(frame, ts))
+    events.extend(stream.finish())
+    return events
+
+
+def _init_worker():
+    # one core per file; let the pool provide the parallelism
+    cv2.setNumThreads(1)
+    torch = sys.modules.get("torch")
+    if torch is not None:
+        torch.set_num_threads(1)
+
+
+def _run(job):
+    source, kwargs = job
+    try:
+        events = recognize(source, **kwargs)
+    except Exception as e:
+        events = [{"t": 0.0, "type": "error", "error": f"{type(e).__name__}: {e}"}]
+    return source, events
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recognize signs from recorded videos or frame folders")
+    parser.add_argument("sources", nargs="+", help="video files or directories of frames")
+    parser.add_argument("--out", help="JSONL output path (default: stdout)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--recognizer", choices=config.RECOGNIZERS, default=config.RECOGNIZER)
+    parser.add_argument("--fps", type=float, default=30.0, help="frame rate assumed for frame folders")
+    parser.add_argument("--no-flip", action="store_true", help="frames are already mirrored like the live view")
+    parser.add_argument("--no-gate", action="store_true", help="classify every frame")
+    args = parser.parse_args()
+
+    kwargs = {"mode": args.recognizer, "fps": args.fps, "flip": not args.no_flip, "gate": not args.no_gate}
+    jobs = [(source, kwargs) for source in args.sources]
+    out = open(args.out, "w") if args.out else sys.stdout
+    try:
+        with Pool(min(args.workers, len(jobs)), initializer=_init_worker) as pool:
+            for source, events in pool.imap_unordered(_run, jobs):
+                for event in events:
+                    out.write(json.dumps({"source": source, **event}) + "\n")
+                out.flush()
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+
+if __name__ == "__main__":
+    main()
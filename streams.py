@@ -0,0 +1,388 @@
+import argparse
+import json
+import multiprocessing as mp
+import os
+import queue
+import threading
+import time
+from collections import deque
+
+import cv2
+
+import config
+from replay import IMAGE_EXTS
+
+# =====================================================
+# FRAME SOURCES
+# =====================================================
+class FileCamera:
+    """A video file or frame folder replayed in real time, looping; a stand-in for cv2.VideoCapture.
+
+    read() returns the frame that is "live" at the current wall-clock time,
+    so a reader that falls behind skips frames exactly like a real camera
+    whose buffer it doesn't drain. `skipped` counts them. Frames are decoded
+    on demand (skipped ones are only grabbed), so memory doesn't grow with
+    the length of the clip. Videos play at their own frame rate unless
+    `fps` is given; folders default to 30 fps.
+    """
+
+    # further ahead than this, seeking is cheaper than grabbing frame by frame
+    SEEK_AFTER = 30
+
+    def __init__(self, source, fps=None, loop=True):
+        if os.path.isdir(source):
+            self.cap = None
+            self.files = [os.path.join(source, f) for f in sorted(os.listdir(source))
+                          if f.lower().endswith(IMAGE_EXTS)]
+            self.length = len(self.files)
+            self.fps = fps or 30.0
+        else:
+            self.cap = cv2.VideoCapture(source)
+            self.files = None
+            # unknown until the first pass hits the end; frame counts in
+            # container headers are not reliable enough to loop on
+            self.length = None
+            self.fps = fps or self.cap.get(cv2.CAP_PROP_FPS) or 30.0
+        self.pos = 0
+        if self.length == 0 or self._frame(0) is None:
+            self.release()
+            raise ValueError(f"no frames in {source!r}")
+        self.loop = loop
+        self.start = None
+        self.last = -1
+        self.skipped = 0
+
+    def _frame(self, j):
+        """Decode frame `j` of the source, or None past its end."""
+        if self.files is not None:
+            return cv2.imread(self.files[j]) if j < self.length else None
+        if j < self.pos or j - self.pos > self.SEEK_AFTER:
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, j)
+            self.pos = j
+        while self.pos < j:
+            if not self.cap.grab():
+                return None
+            self.pos += 1
+        ok, frame = self.cap.read()
+        if not ok:
+            return None
+        self.pos += 1
+        return frame
+
+    def read(self):
+        now = time.perf_counter()
+        if self.start is None:
+            self.start = now
+        i = max(int((now - self.start) * self.fps), self.last + 1)
+        # wait for the next frame instead of returning the same one twice
+        due = self.start + i / self.fps
+        if due > now:
+            time.sleep(due - now)
+        if self.length is not None and not self.loop and i >= self.length:
+            return False, None
+        frame = self._frame(i % self.length if self.length else i)
+        if frame is None and self.length is None:
+            # first end of the video: its length is now known
+            self.length = self.pos
+            if not self.loop:
+                return False, None
+            frame = self._frame(i % self.length)
+        if frame is None:
+            return False, None
+        self.skipped += max(0, i - self.last - 1)
+        self.last = i
+        return True, frame
+
+    def release(self):
+        if self.cap is not None:
+            self.cap.release()
+
+
+class LatestFrameCamera:
+    """A live cv2.VideoCapture drained by a reader thread, so read() returns the newest frame.
+
+    The driver keeps buffering while a throttled worker sleeps; reading in
+    the background keeps that buffer empty, so latency stays at one frame.
+    Frames replaced before anyone read them are counted in `skipped`.
+    """
+
+    def __init__(self, cap):
+        self.cap = cap
+        self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+        self.frame = None
+        self.fresh = False
+        self.ok = True
+        self.skipped = 0
+        self.cond = threading.Condition()
+        self.running = True
+        self.thread = threading.Thread(target=self._reader, daemon=True)
+        self.thread.start()
+
+    def _reader(self):
+        while self.running:
+            ok, frame = self.cap.read()
+            with self.cond:
+                if not ok:
+                    self.ok = False
+                    self.cond.notify_all()
+                    return
+                self.skipped += self.fresh
+                self.frame = frame
+                self.fresh = True
+                self.cond.notify_all()
+
+    def read(self):
+        with self.cond:
+            self.cond.wait_for(lambda: self.fresh or not self.ok)
+            if not self.fresh:
+                return False, None
+            self.fresh = False
+            return True, self.frame
+
+    def release(self):
+        self.running = False
+        self.thread.join(timeout=1.0)
+        self.cap.release()
+
+
+def open_source(source, fps=None):
+    """Camera index ("0", "1", ...) -> LatestFrameCamera; file or folder -> FileCamera."""
+    if str(source).isdigit():
+        return LatestFrameCamera(cv2.VideoCapture(int(source)))
+    if os.path.isdir(source) or os.path.splitext(source)[1].lower() not in IMAGE_EXTS:
+        return FileCamera(source, fps)
+    raise ValueError(f"unsupported source {source!r}")
+
+
+def default_setup(mode):
+    """(hands, recognizer) for one worker process."""
+    import registry
+
+    return registry.create_hands(), registry.get_recognizer(mode)
+
+
+# =====================================================
+# WORKER PROCESS (one per stream)
+# =====================================================
+def _pin(core):
+    if core is not None and hasattr(os, "sched_setaffinity"):
+        try:
+            os.sched_setaffinity(0, {core})
+        except OSError:
+            pass
+    cv2.setNumThreads(1)
+
+
+def run_stream(stream_id, source, core, out, stop, max_fps, mode=None, fps=None, flip=True,
+               setup=default_setup, report_every=0.5):
+    """Recognition loop for one stream; events and stats go to `out` as (stream_id, kind, payload)."""
+    from gating import PoseGate
+    from recognition import StreamRecognizer
+
+    _pin(core)
+    try:
+        cap = open_source(source, fps)
+        hands, recognizer = setup(mode)
+    except Exception as e:
+        out.put((stream_id, "error", f"{type(e).__name__}: {e}"))
+        out.put((stream_id, "done", None))
+        return
+
+    stream = StreamRecognizer(hands, recognizer, None, PoseGate(), flip)
+    stream.assembler.reset(now=0.0)
+    t_start = time.perf_counter()
+    processed = 0
+    busy = 0.0
+    window = deque(maxlen=60)
+    last_report = t_start
+    try:
+        while not stop.is_set():
+            limit = max_fps.value
+            if limit > 0 and window:
+                # throttled by the manager; the camera keeps running, so
+                # frames in between are dropped rather than queued
+                wait = 1.0 / limit - (time.perf_counter() - window[-1])
+                if wait > 0:
+                    time.sleep(wait)
+            ok, frame = cap.read()
+            if not ok:
+                break
+            t0 = time.perf_counter()
+            for event in stream.process(frame, t0 - t_start):
+                out.put((stream_id, "event", event))
+            t1 = time.perf_counter()
+            busy += t1 - t0
+            processed += 1
+            window.append(t1)
+
+            if t1 - last_report >= report_every:
+                fps_now = (len(window) - 1) / (window[-1] - window[0]) if len(window) > 1 else 0.0
+                out.put((stream_id, "stats", {
+                    "fps": fps_now,
+                    "processed": processed,
+                    "dropped": cap.skipped,
+                    "busy_ms": 1000 * busy / processed,
+                    "word": stream.assembler.current_word,
+                    "sentence": stream.assembler.sentence,
+                    "core": core,
+                }))
+                last_report = t1
+    finally:
+        for event in stream.finish():
+            out.put((stream_id, "event", event))
+        cap.release()
+        out.put((stream_id, "done", None))
+
+
+# =====================================================
+# STREAM MANAGER
+# =====================================================
+class StreamManager:
+    """Runs one recognition process per stream and aggregates their results.
+
+    Workers are pinned round-robin over `cores` (default: the cores this
+    process may use). Each keeps its own hands graph, recognizer and letter
+    state, and always reads the newest frame, so a slow stream drops frames
+    instead of building latency. When there are more streams than cores the
+    host is oversubscribed; the manager then caps every stream at an equal
+    share of `target_fps * cores` (policy "fair"), or leaves them to drop
+    frames on their own (policy "drop").
+    """
+
+    def __init__(self, sources, mode=None, fps=None, cores=None, policy="fair", target_fps=None,
+                 flip=True, setup=default_setup, history=200):
+        if cores is None:
+            cores = sorted(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else list(range(os.cpu_count()))
+        self.sources = list(sources)
+        self.cores = cores
+        self.policy = policy
+        self.target_fps = target_fps or fps or 30.0
+        self.ctx = mp.get_context("spawn" if os.name == "nt" else "fork")
+        self.out = self.ctx.Queue()
+        self.stop_event = self.ctx.Event()
+        self.max_fps = self.ctx.Value("d", self._fair_share())
+        self.kwargs = {"mode": mode, "fps": fps, "flip": flip, "setup": setup}
+        self.view = {i: {"source": s, "state": "starting"} for i, s in enumerate(self.sources)}
+        self.events = deque(maxlen=history)
+        self.pending = []
+        self.lock = threading.Lock()
+        self.procs = []
+        self.collector = None
+
+    def _fair_share(self):
+        if self.policy == "fair" and len(self.sources) > len(self.cores):
+            return self.target_fps * len(self.cores) / len(self.sources)
+        return 0.0
+
+    def start(self):
+        for i, source in enumerate(self.sources):
+            core = self.cores[i % len(self.cores)] if self.cores else None
+            proc = self.ctx.Process(
+                target=run_stream, daemon=True,
+                args=(i, source, core, self.out, self.stop_event, self.max_fps), kwargs=self.kwargs,
+            )
+            proc.start()
+            self.procs.append(proc)
+        self.collector = threading.Thread(target=self._collect, daemon=True)
+        self.collector.start()
+        return self
+
+    def _collect(self):
+        running = len(self.procs)
+        while running:
+            try:
+                stream_id, kind, payload = self.out.get(timeout=0.5)
+            except queue.Empty:
+                if not any(p.is_alive() for p in self.procs):
+                    break
+                continue
+            with self.lock:
+                entry = self.view[stream_id]
+                if kind == "stats":
+                    entry.update(payload, state="running")
+                elif kind == "event":
+                    event = {"stream": stream_id, **payload}
+                    self.events.append(event)
+                    self.pending.append(event)
+                    if payload["type"] == "sentence":
+                        entry["sentence"] = payload["sentence"]
+                elif kind == "error":
+                    entry.update(state="error", error=payload)
+                elif kind == "done":
+                    running -= 1
+                    if entry["state"] != "error":
+                        entry["state"] = "done"
+
+    def snapshot(self):
+        """{stream_id: latest stats/state} and the recent events, for a dashboard or CLI."""
+        with self.lock:
+            return {i: dict(v) for i, v in self.view.items()}, list(self.events)
+
+    def new_events(self):
+        """Events received since the last call."""
+        with self.lock:
+            events, self.pending = self.pending, []
+        return events
+
+    def report(self):
+        view, _ = self.snapshot()
+        running = [v for v in view.values() if v["state"] == "running"]
+        return {
+            "streams": len(view),
+            "running": len(running),
+            "total_fps": sum(v.get("fps", 0.0) for v in running),
+            "dropped": sum(v.get("dropped", 0) for v in view.values()),
+            "max_fps_per_stream": self.max_fps.value or None,
+        }
+
+    def stop(self, timeout=5.0):
+        self.stop_event.set()
+        for proc in self.procs:
+            proc.join(timeout)
+            if proc.is_alive():
+                proc.terminate()
+        if self.collector is not None:
+            self.collector.join(timeout)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recognize several cameras or recorded streams at once")
+    parser.add_argument("sources", nargs="+", help="camera indexes, video files or frame folders (replayed live)")
+    parser.add_argument("--recognizer", choices=config.RECOGNIZERS, default=config.RECOGNIZER)
+    parser.add_argument("--fps", type=float, help="replay rate of file-backed streams (default: the video's own, 30 for folders)")
+    parser.add_argument("--policy", choices=["fair", "drop"], default="fair",
+                        help="when streams outnumber cores: cap each stream's fps evenly, or just drop frames")
+    parser.add_argument("--cores", help="comma-separated core ids to pin workers to")
+    parser.add_argument("--duration", type=float, default=0, help="stop after N seconds (0: until Ctrl+C)")
+    parser.add_argument("--events", action="store_true", help="print recognition events as JSONL")
+    args = parser.parse_args()
+
+    cores = [int(c) for c in args.cores.split(",")] if args.cores else None
+    manager = StreamManager(args.sources, args.recognizer, args.fps, cores, args.policy)
+    t0 = time.time()
+    with manager:
+        try:
+            while not args.duration or time.time() - t0 < args.duration:
+                time.sleep(1.0)
+                view, _ = manager.snapshot()
+                if args.events:
+                    for event in manager.new_events():
+                        print(json.dumps(event))
+                for i, v in view.items():
+                    print(f"[{i}] {v['state']:<8} {v.get('fps', 0):5.1f} fps  dropped {v.get('dropped', 0):<6} "
+                          f"{v.get('sentence', '')!r} {v.get('word', '')!r}  {v['source']}")
+                print(manager.report())
+                if all(v["state"] in ("done", "error") for v in view.values()):
+                    break
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
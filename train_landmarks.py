@@ -0,0 +1,94 @@
+import argparse
+import os
+import time
+
+import cv2
+import numpy as np
+
+import config
+from landmark_classifier import landmark_features, fit_centroid, fit_mlp
+
+IMAGE_EXTS = (".jpg", ".jpeg", ".png", ".bmp", ".webp")
+
+
+def class_names(split_dir):
+    # same ordering ultralytics uses for classify datasets
+    return sorted(d for d in os.listdir(split_dir) if os.path.isdir(os.path.join(split_dir, d)))
+
+
+def extract_split(hands, split_dir, names):
+    X, y, skipped = [], [], 0
+    for label, name in enumerate(names):
+        class_dir = os.path.join(split_dir, name)
+        if not os.path.isdir(class_dir):
+            continue
+        for fname in sorted(os.listdir(class_dir)):
+            if not fname.lower().endswith(IMAGE_EXTS):
+                continue
+            img = cv2.imread(os.path.join(class_dir, fname))
+            if img is None:
+                skipped += 1
+                continue
+            result = hands.process(cv2.cvtColor(img, cv2.COLOR_BGR2RGB))
+            if not result.multi_hand_landmarks:
+                skipped += 1
+                continue
+            X.append(landmark_features(result.multi_hand_landmarks[0]))
+            y.append(label)
+    return np.array(X, dtype=np.float32), np.array(y, dtype=np.int64), skipped
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the landmark letter classifier")
+    parser.add_argument("--data", default="dataset")
+    parser.add_argument("--out", default=config.LANDMARK_MODEL_PATH)
+    parser.add_argument("--kind", choices=["mlp", "centroid"], default="mlp")
+    parser.add_argument("--hidden", type=int, default=64)
+    parser.add_argument("--epochs", type=int, default=500)
+    parser.add_argument("--cache", nargs="?", const=config.CROP_CACHE_DIR,
+                        help="read landmarks from the crop cache (crop_cache.py build) instead of the images")
+    args = parser.parse_args()
+
+    train_dir = os.path.join(args.data, "train")
+    val_dir = next((os.path.join(args.data, s) for s in ("val", "test")
+                    if os.path.isdir(os.path.join(args.data, s))), None)
+    names = class_names(train_dir)
+
+    if args.cache:
+        from crop_cache import open_split
+
+        def extract(split_dir):
+            split = open_split(args.cache, os.path.basename(split_dir))
+            return (*split.features(), split.no_hand)
+    else:
+        import mediapipe as mp
+
+        hands = mp.solutions.hands.Hands(static_image_mode=True, max_num_hands=1)
+
+        def extract(split_dir):
+            return extract_split(hands, split_dir, names)
+
+    X, y, skipped = extract(train_dir)
+    print(f"train: {len(X)} samples, {skipped} without a detected hand")
+
+    if args.kind == "centroid":
+        clf = fit_centroid(X, y, names)
+    else:
+        clf = fit_mlp(X, y, names, hidden=args.hidden, epochs=args.epochs)
+
+    if val_dir:
+        Xv, yv, skipped = extract(val_dir)
+        if len(Xv):
+            t0 = time.perf_counter()
+            pred = clf.predict_proba(Xv).argmax(1)
+            per_frame_ms = 1000 * (time.perf_counter() - t0) / len(Xv)
+            print(f"val: {len(Xv)} samples, {skipped} without a detected hand, "
+                  f"top1 {np.mean(pred == yv):.3f}, {per_frame_ms:.3f} ms/sample")
+
+    os.makedirs(os.path.dirname(args.out) or ".", exist_ok=True)
+    clf.save(args.out)
+    print(f"saved {args.out}")
+
+
+if __name__ == "__main__":
+    main()
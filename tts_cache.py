@@ -0,0 +1,253 @@
+import argparse
+import asyncio
+import hashlib
+import io
+import math
+import os
+import struct
+import threading
+import wave
+from collections import OrderedDict
+
+import config
+
+# =====================================================
+# SYNTHESIS ENGINES
+# =====================================================
+class EdgeEngine:
+    """Microsoft Edge online TTS via edge-tts."""
+
+    name = "edge"
+    ext = ".mp3"
+
+    async def stream(self, text, voice, rate):
+        """Yield mp3 chunks as the service sends them."""
+        import edge_tts
+
+        async for chunk in edge_tts.Communicate(text=text, voice=voice, rate=rate).stream():
+            if chunk["type"] == "audio":
+                yield chunk["data"]
+
+    async def synthesize(self, text, voice, rate):
+        audio = bytearray()
+        async for chunk in self.stream(text, voice, rate):
+            audio += chunk
+        return bytes(audio)
+
+
+class OfflineEngine:
+    """Deterministic offline stand-in: a short tone per word, as 16 kHz mono WAV.
+
+    Lets the cache and the speech path run without network access (tests,
+    air-gapped hosts). Same text always yields the same bytes.
+    """
+
+    name = "offline"
+    ext = ".wav"
+    sample_rate = 16000
+
+    async def synthesize(self, text, voice, rate):
+        samples = bytearray()
+        for word in text.split() or [""]:
+            freq = 300 + int(hashlib.md5(word.encode()).hexdigest()[:4], 16) % 400
+            for i in range(int(self.sample_rate * 0.25)):
+                samples += struct.pack("<h", int(8000 * math.sin(2 * math.pi * freq * i / self.sample_rate)))
+            samples += b"\0\0" * int(self.sample_rate * 0.05)
+        buf = io.BytesIO()
+        with wave.open(buf, "wb") as w:
+            w.setnchannels(1)
+            w.setsampwidth(2)
+            w.setframerate(self.sample_rate)
+            w.writeframes(bytes(samples))
+        return buf.getvalue()
+
+    async def stream(self, text, voice, rate):
+        yield await self.synthesize(text, voice, rate)
+
+
+ENGINES = {"edge": EdgeEngine, "offline": OfflineEngine}
+
+
+def cache_key(engine, text, voice, rate):
+    return hashlib.sha256(f"{engine}\0{voice}\0{rate}\0{text}".encode()).hexdigest()
+
+
+# =====================================================
+# STORES
+# =====================================================
+class MemoryLRU:
+    """In-memory LRU bounded by total bytes."""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.items = OrderedDict()
+        self.size = 0
+
+    def get(self, key):
+        data = self.items.get(key)
+        if data is not None:
+            self.items.move_to_end(key)
+        return data
+
+    def put(self, key, data):
+        if len(data) > self.max_bytes:
+            return
+        if key in self.items:
+            self.size -= len(self.items.pop(key))
+        self.items[key] = data
+        self.size += len(data)
+        while self.size > self.max_bytes:
+            _, old = self.items.popitem(last=False)
+            self.size -= len(old)
+
+
+class DiskStore:
+    """Audio files named by key, bounded by total bytes; least recently used go first."""
+
+    def __init__(self, directory, max_bytes, ext):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.ext = ext
+        os.makedirs(directory, exist_ok=True)
+        # key -> size, in least-recently-used order (mtime is refreshed on hits)
+        entries = []
+        for fname in os.listdir(directory):
+            if fname.endswith(ext):
+                st = os.stat(os.path.join(directory, fname))
+                entries.append((st.st_mtime, fname[:-len(ext)], st.st_size))
+        self.index = OrderedDict((key, size) for _, key, size in sorted(entries))
+        self.size = sum(self.index.values())
+
+    def path(self, key):
+        return os.path.join(self.directory, key + self.ext)
+
+    def get(self, key):
+        if key not in self.index:
+            return None
+        try:
+            with open(self.path(key), "rb") as f:
+                data = f.read()
+            os.utime(self.path(key))
+        except OSError:
+            self.size -= self.index.pop(key)
+            return None
+        self.index.move_to_end(key)
+        return data
+
+    def put(self, key, data):
+        if len(data) > self.max_bytes:
+            return
+        tmp = self.path(key) + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, self.path(key))
+        if key in self.index:
+            self.size -= self.index.pop(key)
+        self.index[key] = len(data)
+        self.size += len(data)
+        while self.size > self.max_bytes:
+            old, size = self.index.popitem(last=False)
+            self.size -= size
+            try:
+                os.remove(self.path(old))
+            except OSError:
+                pass
+
+
+# =====================================================
+# CACHE
+# =====================================================
+class TTSCache:
+    """Content-addressed TTS audio cache: memory LRU, then disk, then the engine."""
+
+    def __init__(self, engine=None, memory_bytes=config.TTS_MEMORY_MB << 20,
+                 disk_dir=config.TTS_CACHE_DIR, disk_bytes=config.TTS_DISK_MB << 20):
+        self.engine = engine or ENGINES[config.TTS_ENGINE]()
+        self.memory = MemoryLRU(memory_bytes)
+        self.disk = DiskStore(os.path.join(disk_dir, self.engine.name), disk_bytes, self.engine.ext)
+        self.lock = threading.Lock()
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0}
+
+    def lookup(self, text, voice=config.TTS_VOICE, rate=config.TTS_RATE):
+        """Cached audio bytes, or None; never synthesizes."""
+        key = cache_key(self.engine.name, text, voice, rate)
+        with self.lock:
+            data = self.memory.get(key)
+            if data is not None:
+                self.stats["memory_hits"] += 1
+                return data
+            data = self.disk.get(key)
+            if data is not None:
+                self.stats["disk_hits"] += 1
+                self.memory.put(key, data)
+            return data
+
+    def store(self, text, data, voice=config.TTS_VOICE, rate=config.TTS_RATE):
+        key = cache_key(self.engine.name, text, voice, rate)
+        with self.lock:
+            self.memory.put(key, data)
+            self.disk.put(key, data)
+
+    async def get(self, text, voice=config.TTS_VOICE, rate=config.TTS_RATE):
+        data = self.lookup(text, voice, rate)
+        if data is not None:
+            return data
+        with self.lock:
+            self.stats["misses"] += 1
+        data = await self.engine.synthesize(text, voice, rate)
+        if data:
+            self.store(text, data, voice, rate)
+        return data
+
+    async def stream(self, text, voice=config.TTS_VOICE, rate=config.TTS_RATE):
+        """Yield audio chunks: the whole clip on a hit, engine chunks as they arrive on a miss."""
+        data = self.lookup(text, voice, rate)
+        if data is not None:
+            yield data
+            return
+        with self.lock:
+            self.stats["misses"] += 1
+        audio = bytearray()
+        async for chunk in self.engine.stream(text, voice, rate):
+            audio += chunk
+            yield chunk
+        if audio:
+            self.store(text, bytes(audio), voice, rate)
+
+    async def prewarm(self, phrases, voice=config.TTS_VOICE, rate=config.TTS_RATE):
+        for phrase in phrases:
+            await self.get(phrase, voice, rate)
+
+    def report(self):
+        with self.lock:
+            total = sum(self.stats.values())
+            hits = self.stats["memory_hits"] + self.stats["disk_hits"]
+            return {
+                **self.stats,
+                "hit_rate": hits / total if total else 0.0,
+                "memory_bytes": self.memory.size,
+                "memory_entries": len(self.memory.items),
+                "disk_bytes": self.disk.size,
+                "disk_entries": len(self.disk.index),
+            }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="TTS audio cache maintenance")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    warm = sub.add_parser("prewarm", help="synthesize every phrase in a file (one per line)")
+    warm.add_argument("phrases")
+    sub.add_parser("stats", help="show disk cache size")
+    parser.add_argument("--engine", choices=sorted(ENGINES), default=config.TTS_ENGINE)
+    args = parser.parse_args()
+
+    cache = TTSCache(ENGINES[args.engine]())
+    if args.cmd == "prewarm":
+        with open(args.phrases, encoding="utf-8") as f:
+            phrases = [line.strip() for line in f if line.strip()]
+        asyncio.run(cache.prewarm(phrases))
+    print(cache.report())
+
+
+if __name__ == "__main__":
+    main()
@@ -1,24 +1,273 @@
 import asyncio
-import edge_tts
-import uuid
+import itertools
 import os
+import shutil
+import tempfile
 import threading
-from playsound import playsound
-
-def _run_tts(sentence):
-    async def _speak():
-        filename = f"tts_{uuid.uuid4().hex}.mp3"
-        communicate = edge_tts.Communicate(
-            text=sentence,
-            voice="en-US-AriaNeural"
+import time
+from collections import deque
+
+from tts_cache import TTSCache
+
+# =====================================================
+# PLAYERS
+# =====================================================
+class FfplayPlayer:
+    """Pipes audio into ffplay as it arrives; no temp files, killable."""
+
+    async def play(self, chunks, on_start=None):
+        proc = await asyncio.create_subprocess_exec(
+            "ffplay", "-nodisp", "-autoexit", "-loglevel", "quiet", "-i", "pipe:0",
+            stdin=asyncio.subprocess.PIPE,
         )
-        await communicate.save(filename)
-        playsound(filename)
-        os.remove(filename)
+        try:
+            async for chunk in chunks:
+                if on_start:
+                    on_start()
+                    on_start = None
+                proc.stdin.write(chunk)
+                await proc.stdin.drain()
+            proc.stdin.close()
+            await proc.wait()
+        except asyncio.CancelledError:
+            proc.kill()
+            await proc.wait()
+            raise
+
+
+class PlaysoundPlayer:
+    """Fallback when ffplay is missing: playsound needs a whole file and can't be interrupted."""
+
+    def __init__(self, ext):
+        self.ext = ext
+
+    async def play(self, chunks, on_start=None):
+        from playsound import playsound
+
+        audio = b"".join([chunk async for chunk in chunks])
+        fd, path = tempfile.mkstemp(suffix=self.ext)
+        with os.fdopen(fd, "wb") as f:
+            f.write(audio)
+        try:
+            if on_start:
+                on_start()
+            await asyncio.get_running_loop().run_in_executor(None, playsound, path)
+        finally:
+            os.remove(path)
+
+
+def default_player(ext):
+    return FfplayPlayer() if shutil.which("ffplay") else PlaysoundPlayer(ext)
+
+
+# =====================================================
+# SPEECH WORKER
+# =====================================================
+URGENT, NORMAL, LOW = 0, 1, 2
+
+
+class Utterance:
+    def __init__(self, uid, text, priority, session=None):
+        self.id = uid
+        self.text = text
+        self.priority = priority
+        self.session = session
+        self.queued_at = time.perf_counter()
+        self.cancelled = False
+        self.chunks = None
+        self.fill_task = None
+
+    async def iter_chunks(self):
+        while True:
+            chunk = await self.chunks.get()
+            if chunk is None:
+                return
+            yield chunk
+
+
+class SpeechWorker:
+    """One long-lived thread and asyncio loop that speaks utterances in priority order.
+
+    Calls are thread-safe and return immediately. Synthesis runs one
+    utterance ahead of playback, and audio is streamed to the player chunk
+    by chunk as it arrives, so consecutive short utterances (e.g. words
+    spoken as they are recognized) follow each other without a synthesis gap.
+    Only one utterance plays at a time; interrupt() stops it, cancel() drops
+    a queued one, and speak(..., replace_pending=True) discards everything
+    still waiting. The worker is shared by every Streamlit session, so
+    utterances carry a `session` tag: clearing and interrupting with a
+    session given only touch that session's speech.
+    """
+
+    def __init__(self, cache=None, player=None, window=200, lookahead=1):
+        self.cache = cache or TTSCache()
+        self.player = player or default_player(self.cache.engine.ext)
+        self.lookahead = lookahead
+        self.ids = itertools.count(1)
+        self.pending = {}
+        self.current = None
+        self.current_task = None
+        self.last_error = None
+        self.queue_latency = deque(maxlen=window)
+        self.first_audio = deque(maxlen=window)
+        self.loop = asyncio.new_event_loop()
+        self.ready = threading.Event()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+        self.ready.wait()
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        self.queue = asyncio.PriorityQueue()
+        self.synthesized = asyncio.Queue(self.lookahead)
+        self.loop.create_task(self._synthesize_loop())
+        self.loop.create_task(self._play_loop())
+        self.ready.set()
+        self.loop.run_forever()
+
+    # ---------------- public, any thread ----------------
+    def speak(self, text, priority=NORMAL, replace_pending=False, interrupt=False, session=None):
+        utt = Utterance(next(self.ids), text, priority, session)
+        self.loop.call_soon_threadsafe(self._enqueue, utt, replace_pending, interrupt)
+        return utt.id
+
+    def cancel(self, uid):
+        self.loop.call_soon_threadsafe(self._cancel, uid)
+
+    def interrupt(self, session=None):
+        """Stop what is playing; with `session`, only if it belongs to that session."""
+        self.loop.call_soon_threadsafe(self._interrupt, session)
+
+    def clear(self, session=None):
+        """Drop queued utterances; with `session`, only that session's."""
+        self.loop.call_soon_threadsafe(self._clear, session)
+
+    def stats(self):
+        def pct(values, q):
+            values = sorted(values)
+            return 1000 * values[min(len(values) - 1, int(q * len(values)))] if values else 0.0
+
+        return {
+            "pending": len(self.pending),
+            "speaking": self.current.text if self.current else None,
+            "queue_ms_p50": pct(self.queue_latency, 0.5),
+            "queue_ms_p99": pct(self.queue_latency, 0.99),
+            "first_audio_ms_p50": pct(self.first_audio, 0.5),
+            "first_audio_ms_p99": pct(self.first_audio, 0.99),
+            "last_error": self.last_error,
+            "cache": self.cache.report(),
+        }
+
+    # ---------------- loop side ----------------
+    def _enqueue(self, utt, replace_pending, interrupt):
+        if replace_pending:
+            self._clear(utt.session)
+        if interrupt:
+            self._interrupt(utt.session)
+        self.pending[utt.id] = utt
+        self.queue.put_nowait((utt.priority, utt.id, utt))
+
+    def _drop(self, utt):
+        utt.cancelled = True
+        if utt.fill_task is not None:
+            utt.fill_task.cancel()
+
+    def _cancel(self, uid):
+        utt = self.pending.pop(uid, None)
+        if utt is not None:
+            self._drop(utt)
+        elif self.current is not None and self.current.id == uid:
+            self._interrupt()
+
+    def _interrupt(self, session=None):
+        if self.current_task is not None and (session is None or self.current.session == session):
+            self.current_task.cancel()
+
+    def _clear(self, session=None):
+        for uid, utt in list(self.pending.items()):
+            if session is None or utt.session == session:
+                self._drop(utt)
+                del self.pending[uid]
+
+    async def _fill(self, utt):
+        try:
+            async for chunk in self.cache.stream(utt.text):
+                utt.chunks.put_nowait(chunk)
+        except Exception as e:
+            self.last_error = repr(e)
+        finally:
+            utt.chunks.put_nowait(None)
+
+    async def _synthesize_loop(self):
+        while True:
+            _, _, utt = await self.queue.get()
+            if utt.cancelled:
+                continue
+            utt.chunks = asyncio.Queue()
+            # waits while `lookahead` utterances are already synthesized but not playing
+            await self.synthesized.put(utt)
+            if utt.cancelled:
+                # dropped while waiting for a slot; don't synthesize it
+                continue
+            utt.fill_task = asyncio.ensure_future(self._fill(utt))
+
+    async def _play_loop(self):
+        while True:
+            utt = await self.synthesized.get()
+            if utt.cancelled:
+                continue
+            self.pending.pop(utt.id, None)
+            self.current = utt
+            self.queue_latency.append(time.perf_counter() - utt.queued_at)
+            self.current_task = asyncio.ensure_future(self._say(utt))
+            try:
+                await self.current_task
+            except asyncio.CancelledError:
+                # fill_task is unset if the interrupt came before synthesis started
+                if utt.fill_task is not None:
+                    utt.fill_task.cancel()
+            except Exception as e:
+                # a failed player must not take the worker down
+                self.last_error = repr(e)
+            finally:
+                self.current = None
+                self.current_task = None
+
+    async def _say(self, utt):
+        def started():
+            self.first_audio.append(time.perf_counter() - utt.queued_at)
+
+        await self.player.play(utt.iter_chunks(), on_start=started)
+
+
+_worker = None
+_worker_lock = threading.Lock()
+
+
+def get_worker():
+    global _worker
+    with _worker_lock:
+        if _worker is None:
+            _worker = SpeechWorker()
+        return _worker
+
+
+def speak_sentence(sentence, session=None):
+    # a new sentence supersedes anything this session has not yet spoken
+    return get_worker().speak(sentence, replace_pending=True, session=session)
+
+
+def speak_word(word, session=None):
+    # queued behind what is already playing; synthesized while it plays
+    return get_worker().speak(word, session=session)
+
 
-    asyncio.run(_speak())
+def stop_speaking(session=None):
+    worker = get_worker()
+    worker.clear(session)
+    worker.interrupt(session)
 
-def speak_sentence(sentence):
-    t = threading.Thread(target=_run_tts, args=(sentence,))
-    t.start()
 
+def speech_stats():
+    """SpeechWorker.stats(), or None before anything has been spoken."""
+    return _worker.stats() if _worker is not None else None